@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Инкрементальный BSL-анализ выгрузки xml/ с кэшем диагностик по содержимому модулей.
+
+Для каждого *.bsl считается sha1 пути и содержимого. Диагностики неизменённых файлов берутся
+из кэша logs/bsl-cache/, BSL Language Server запускается только на изменённых файлах:
+они копируются во временный каталог вместе с Configuration.xml и описаниями своих объектов.
+Результаты объединяются в logs/bsl-json.json в формате BSL LS, дальше его читает
+bsl_report_summary.py.
+
+Кэш привязан к версии BSL LS (имя jar) и .bsl-language-server.json: при их изменении
+анализ выполняется заново целиком. Диагностики, зависящие от других объектов метаданных,
+при анализе части файлов могут отличаться от полного прогона — для эталона используйте --full.
+
+Запуск (из каталога automation):
+    python bsl_analyze.py              # только изменённые файлы
+    python bsl_analyze.py --full       # весь xml/, кэш перестраивается
+    run-bsl-analyze.bat                # анализ + bsl_report_summary.py
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bsl_report_summary import iter_report, short_path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPT_DIR.parent
+XML_DIR = ROOT_DIR / "xml"
+LOGS_DIR = SCRIPT_DIR / "logs"
+CONFIG_PATH = ROOT_DIR / ".bsl-language-server.json"
+CACHE_DIR = LOGS_DIR / "bsl-cache"
+JAR_PATTERN = "bsl-language-server-*-exec.jar"
+# Доля изменённых файлов, начиная с которой выгоднее проанализировать весь xml/
+FULL_RUN_SHARE = 0.5
+# Сколько хранить записи кэша для содержимого, которого сейчас нет (переключение веток, откат правки)
+STALE_CACHE_DAYS = 7
+
+
+def find_jar():
+    jars = sorted(SCRIPT_DIR.glob(JAR_PATTERN))
+    return jars[-1] if jars else None
+
+
+def _sha1(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def cache_dir_for(jar):
+    """Каталог кэша для версии BSL LS и её настроек."""
+    config = CONFIG_PATH.read_bytes() if CONFIG_PATH.exists() else b""
+    return CACHE_DIR / _sha1(jar.name.encode("utf-8"), config)[:12]
+
+
+def list_modules():
+    """{путь xml/...: ключ кэша} для всех BSL-файлов выгрузки."""
+    modules = {}
+    for path in sorted(XML_DIR.rglob("*.bsl")):
+        rel_path = path.relative_to(ROOT_DIR).as_posix()
+        modules[rel_path] = _sha1(rel_path.encode("utf-8"), path.read_bytes())
+    return modules
+
+
+def _object_files(rel_path):
+    """
+    Файлы, которые нужны BSL LS для модуля вне полной выгрузки: описания объектов-владельцев
+    (CommonModules/ИИА_DSL.xml, Catalogs/ИИА_Диалоги/Forms/ФормаСписка.xml) и Form.xml формы.
+    """
+    files = []
+    parts = Path(rel_path).parts
+    for i in range(2, len(parts)):
+        candidate = Path(*parts[:i]).with_suffix(".xml")
+        if (ROOT_DIR / candidate).is_file():
+            files.append(candidate.as_posix())
+    if "Ext" in parts and parts[-2:] == ("Form", "Module.bsl"):
+        form_xml = Path(*parts[:-2]) / "Form.xml"
+        if (ROOT_DIR / form_xml).is_file():
+            files.append(form_xml.as_posix())
+    return files
+
+
+def _mirror(changed, work_dir):
+    """Копирует изменённые модули с описаниями объектов в work_dir/xml; возвращает этот каталог."""
+    files = {"xml/Configuration.xml"}
+    for rel_path in changed:
+        files.add(rel_path)
+        files.update(_object_files(rel_path))
+    for rel_path in files:
+        source = ROOT_DIR / rel_path
+        if source.is_file():
+            target = work_dir / rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target)
+    return work_dir / "xml"
+
+
+def run_language_server(jar, src_dir, out_dir):
+    """Запускает BSL LS в режиме анализа; возвращает путь к bsl-json.json."""
+    cmd = ["java", "-Dfile.encoding=UTF-8", "-jar", str(jar), "--analyze", "--srcDir", str(src_dir)]
+    if CONFIG_PATH.exists():
+        cmd += ["--configuration", str(CONFIG_PATH)]
+    cmd += ["--reporter", "json", "-o", str(out_dir), "-q"]
+    subprocess.run(cmd, check=True)
+    return out_dir / "bsl-json.json"
+
+
+def _store(cache_dir, key, item):
+    with open(cache_dir / f"{key}.json", "w", encoding="utf-8") as f:
+        json.dump(item, f, ensure_ascii=False)
+
+
+def store_results(report_path, modules, changed, cache_dir, root=ROOT_DIR):
+    """
+    Сохраняет fileinfo проанализированных файлов в кэш по ключу содержимого; файлы без
+    результата в отчёте сохраняются с пустым списком диагностик. Пути в отчёте берутся
+    относительно root — каталога, в котором лежит проанализированный xml/. Возвращает дату отчёта.
+    """
+    header = {}
+    pending = set(changed)
+    for kind, item in iter_report(report_path):
+        if kind == "header":
+            header = item
+            continue
+        rel_path = short_path(item.get("path", ""), root)
+        if rel_path not in pending:
+            continue
+        item["path"] = rel_path
+        _store(cache_dir, modules[rel_path], item)
+        pending.discard(rel_path)
+    for rel_path in pending:
+        _store(cache_dir, modules[rel_path], {"path": rel_path, "diagnostics": []})
+    return header.get("date")
+
+
+def write_merged_report(path, modules, cache_dir, date):
+    """Пишет bsl-json.json в формате BSL LS из кэша, файл за файлом."""
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        out.write("{" + f'"date":{json.dumps(date, ensure_ascii=False)},'
+                  f'"sourceDir":{json.dumps(str(XML_DIR), ensure_ascii=False)},"fileinfos":[')
+        for i, key in enumerate(modules.values()):
+            with open(cache_dir / f"{key}.json", encoding="utf-8") as f:
+                out.write(("," if i else "") + f.read())
+        out.write("]}")
+    os.replace(tmp_path, path)
+
+
+def prune_cache(cache_dir, modules):
+    """
+    Удаляет записи кэша старше STALE_CACHE_DAYS, не соответствующие текущим файлам,
+    и кэши других версий BSL LS.
+    """
+    keep = {f"{key}.json" for key in modules.values()}
+    expired = time.time() - STALE_CACHE_DAYS * 86400
+    removed = 0
+    for entry in cache_dir.iterdir():
+        if entry.name not in keep and entry.stat().st_mtime < expired:
+            entry.unlink()
+            removed += 1
+    for other in CACHE_DIR.iterdir():
+        if other.is_dir() and other != cache_dir:
+            shutil.rmtree(other, ignore_errors=True)
+    return removed
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Инкрементальный BSL-анализ xml/ с кэшем диагностик")
+    parser.add_argument("--full", action="store_true", help="Проанализировать весь xml/ и перестроить кэш")
+    parser.add_argument("--jar", default=None, help=f"Путь к BSL LS (по умолчанию {JAR_PATTERN} в automation)")
+    args = parser.parse_args()
+
+    jar = Path(args.jar) if args.jar else find_jar()
+    if jar is None or not jar.is_file():
+        print(f"Ошибка: JAR не найден ({args.jar or JAR_PATTERN}).", file=sys.stderr)
+        print("Скачайте bsl-language-server с https://github.com/1c-syntax/bsl-language-server/releases", file=sys.stderr)
+        return 1
+    if not XML_DIR.is_dir():
+        print(f"Ошибка: Каталог xml не найден: {XML_DIR}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    cache_dir = cache_dir_for(jar)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    modules = list_modules()
+    changed = [rel_path for rel_path, key in modules.items()
+               if args.full or not (cache_dir / f"{key}.json").is_file()]
+    full = args.full or len(changed) >= FULL_RUN_SHARE * len(modules)
+
+    date = time.strftime("%Y-%m-%dT%H:%M:%S")
+    if changed:
+        scope = "весь xml/" if full else "только изменённые файлы"
+        print(f"Анализ BSL ({scope}): изменено {len(changed)} из {len(modules)}")
+        with tempfile.TemporaryDirectory(prefix="bsl-") as tmp:
+            work_dir = Path(tmp)
+            src_dir = XML_DIR if full else _mirror(changed, work_dir)
+            try:
+                report_path = run_language_server(jar, src_dir, work_dir / "out")
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"Ошибка запуска BSL Language Server: {e}", file=sys.stderr)
+                return 1
+            analyzed = list(modules) if full else changed
+            root = ROOT_DIR if full else work_dir
+            date = store_results(report_path, modules, analyzed, cache_dir, root) or date
+    else:
+        print(f"Анализ BSL: изменений нет, все {len(modules)} файлов из кэша")
+
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    write_merged_report(LOGS_DIR / "bsl-json.json", modules, cache_dir, date)
+    removed = prune_cache(cache_dir, modules)
+    analyzed = len(modules) if changed and full else len(changed)
+    print(f"Готово за {time.perf_counter() - started:.1f} с: проанализировано {analyzed}, "
+          f"из кэша {len(modules) - analyzed}, удалено из кэша {removed}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
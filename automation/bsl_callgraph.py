@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+Индекс графа вызовов BSL по выгрузке xml/.
+
+Разбирает Module.bsl общих модулей, модули форм и команд: процедуры и функции, признак Экспорт,
+директивы компиляции, вызовы внутри модуля и обращения вида ИИА_DSL.Процедура (в том числе
+в строках фоновых заданий). Результат разбора хранится в файле индекса по каждому BSL-файлу
+вместе с mtime, размером и sha1; при следующем запуске заново разбираются только измененные
+файлы. Граф вызовов собирается из индекса в памяти, запросы (кто вызывает, что вызывает,
+достижимость) выполняются за миллисекунды.
+
+Узел графа — "Модуль.Процедура". Модуль — имя общего модуля (ИИА_DSL) или путь объекта
+для форм и команд (CommonForms/ИИА_Агент/Form, Catalogs/ИИА_Диалоги/Forms/ФормаСписка/Form).
+
+Используется в test_impact.py (выбор затронутых тестов) и long_fix_telegram.py (контекст для анализа).
+
+Запуск (из каталога automation):
+    python bsl_callgraph.py stats
+    python bsl_callgraph.py callers ИИА_DSL.ВыполнитьКоманду
+    python bsl_callgraph.py callees ИИА_Оркестратор.ВыполнитьЦикл --all
+    python bsl_callgraph.py dead               # процедуры без вызовов
+    python bsl_callgraph.py stats --rebuild    # разобрать все файлы заново
+
+Использование из кода:
+    from bsl_callgraph import CallGraph
+    graph = CallGraph.load()
+    graph.callers("ИИА_КэшСеанса.Раздел")
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import hashlib
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+if _script_dir not in sys.path:
+    sys.path.insert(0, _script_dir)
+_root = os.path.dirname(_script_dir)
+
+XML_DIR = "xml"
+COMMON_MODULES_DIR = "CommonModules"
+INDEX_FILE = os.path.join(_script_dir, ".bsl_callgraph.json")
+# Увеличивается при изменении формата разбора: старый индекс перестраивается целиком
+INDEX_VERSION = 1
+
+_ROUTINE_START = re.compile(
+    r"^\s*(?:Асинх\s+)?(Процедура|Функция)\s+(\w+)\s*\(.*?\)\s*(Экспорт)?", re.IGNORECASE
+)
+_ROUTINE_END = re.compile(r"^\s*(?:КонецПроцедуры|КонецФункции)\b", re.IGNORECASE)
+_DIRECTIVE = re.compile(r"^\s*&(\w+)")
+_QUALIFIED_CALL = re.compile(r"\b(\w+)\.(\w+)")
+_LOCAL_CALL = re.compile(r"(?<![\w.])(\w+)\s*\(")
+# Вызовы BSL из Python-скриптов: call_procedure(conn, "Модуль", "Процедура", ...)
+_PY_CALL = re.compile(r"""call_procedure\(\s*[\w.]+\s*,\s*["'](\w+)["']\s*,\s*["'](\w+)["']""")
+
+
+def module_id(rel_path):
+    """
+    Идентификатор модуля по пути BSL-файла относительно xml/:
+    CommonModules/ИИА_DSL/Ext/Module.bsl -> ИИА_DSL,
+    CommonForms/ИИА_Агент/Ext/Form/Module.bsl -> CommonForms/ИИА_Агент/Form.
+    """
+    parts = rel_path.replace("\\", "/").split("/")
+    if len(parts) == 4 and parts[0] == COMMON_MODULES_DIR and parts[2:] == ["Ext", "Module.bsl"]:
+        return parts[1]
+    ext = parts.index("Ext")
+    kind = "/".join(parts[ext + 1:]).rsplit(".", 1)[0]
+    kind = "Form" if kind == "Form/Module" else kind
+    return "/".join(parts[:ext] + [kind])
+
+
+def _code_line(line):
+    """Строка без комментария целиком (// в начале строки)."""
+    return "" if line.lstrip().startswith("//") else line
+
+
+def _unique(items):
+    return list(dict.fromkeys(items))
+
+
+def parse_module(text):
+    """
+    Процедуры и функции модуля в порядке следования:
+    [{name, kind, export, directive, start, end, local, qualified}].
+    local — имена, после которых идет "(" (кандидаты локальных вызовов),
+    qualified — пары [Модуль, Процедура] из обращений через точку. Номера строк с 1.
+    """
+    routines = []
+    current = None
+    directive = ""
+    body = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if current is None:
+            match = _ROUTINE_START.match(line)
+            if match:
+                current = {
+                    "name": match.group(2),
+                    "kind": match.group(1).capitalize(),
+                    "export": bool(match.group(3)),
+                    "directive": directive,
+                    "start": number,
+                }
+                body = []
+                directive = ""
+                continue
+            match = _DIRECTIVE.match(line)
+            if match:
+                directive = match.group(1)
+            elif line.strip() and not line.lstrip().startswith("//"):
+                directive = ""
+            continue
+        if _ROUTINE_END.match(line):
+            code = "\n".join(body)
+            current["end"] = number
+            current["local"] = _unique(_LOCAL_CALL.findall(code))
+            current["qualified"] = [list(pair) for pair in _unique(_QUALIFIED_CALL.findall(code))]
+            routines.append(current)
+            current = None
+            continue
+        body.append(_code_line(line))
+    return routines
+
+
+def _file_sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _list_bsl(root):
+    """Пути BSL-файлов относительно xml/."""
+    base = os.path.join(root, XML_DIR)
+    files = []
+    for directory, _, names in os.walk(base):
+        for name in names:
+            if name.endswith(".bsl"):
+                files.append(os.path.relpath(os.path.join(directory, name), base).replace("\\", "/"))
+    return sorted(files)
+
+
+def update_index(root=_root, index_path=INDEX_FILE, rebuild=False):
+    """
+    Обновляет файл индекса: разбирает новые и измененные BSL-файлы, удаляет исчезнувшие.
+    Файл с прежними mtime и размером берется из индекса без чтения; при другом mtime
+    сравнивается sha1, и разбор повторяется только при изменении содержимого.
+    Возвращает (индекс, {"parsed": n, "reused": n, "removed": n}).
+    """
+    index = {"version": INDEX_VERSION, "files": {}}
+    if not rebuild and index_path and os.path.isfile(index_path):
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if loaded.get("version") == INDEX_VERSION:
+                index = loaded
+        except (OSError, ValueError):
+            pass
+
+    stats = {"parsed": 0, "reused": 0, "removed": 0}
+    old_files = index["files"]
+    files = {}
+    for rel_path in _list_bsl(root):
+        path = os.path.join(root, XML_DIR, rel_path)
+        st = os.stat(path)
+        entry = old_files.get(rel_path)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            files[rel_path] = entry
+            stats["reused"] += 1
+            continue
+        sha1 = _file_sha1(path)
+        if entry and entry["sha1"] == sha1:
+            entry.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+            files[rel_path] = entry
+            stats["reused"] += 1
+            continue
+        with open(path, encoding="utf-8-sig") as f:
+            routines = parse_module(f.read())
+        files[rel_path] = {
+            "module": module_id(rel_path),
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "sha1": sha1,
+            "routines": routines,
+        }
+        stats["parsed"] += 1
+    stats["removed"] = len(set(old_files) - set(files))
+    index["files"] = files
+
+    if index_path and (stats["parsed"] or stats["removed"] or files != old_files):
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+    return index, stats
+
+
+def python_entry_points(root=_root):
+    """Процедуры BSL, вызываемые из Python-скриптов automation через call_procedure."""
+    found = set()
+    automation = os.path.join(root, "automation")
+    for directory, _, names in os.walk(automation):
+        for name in names:
+            if name.endswith(".py"):
+                with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                    found.update(f"{m}.{p}" for m, p in _PY_CALL.findall(f.read()))
+    return found
+
+
+class CallGraph:
+    """Граф вызовов процедур BSL: узлы "Модуль.Процедура", ребра — вызовы."""
+
+    def __init__(self, index):
+        self.files = index["files"]
+        # Узел -> сведения о процедуре (module, name, kind, export, directive, path, start, end)
+        self.nodes = {}
+        # Модуль -> {процедура: узел}
+        self.modules = {}
+        for rel_path, entry in self.files.items():
+            module = entry["module"]
+            names = self.modules.setdefault(module, {})
+            for routine in entry["routines"]:
+                node = f"{module}.{routine['name']}"
+                names[routine["name"]] = node
+                self.nodes[node] = {
+                    "module": module,
+                    "name": routine["name"],
+                    "kind": routine["kind"],
+                    "export": routine["export"],
+                    "directive": routine.get("directive", ""),
+                    "path": f"{XML_DIR}/{rel_path}",
+                    "start": routine["start"],
+                    "end": routine["end"],
+                }
+        self._callees = {}
+        self._callers = {node: [] for node in self.nodes}
+        for entry in self.files.values():
+            module = entry["module"]
+            local = self.modules[module]
+            for routine in entry["routines"]:
+                node = local[routine["name"]]
+                calls = [local[c] for c in routine["local"] if c in local and c != routine["name"]]
+                calls += [
+                    self.modules[m][p] for m, p in routine["qualified"]
+                    if m in self.modules and p in self.modules[m] and self.nodes[self.modules[m][p]]["export"]
+                ]
+                calls = _unique(calls)
+                self._callees[node] = calls
+                for callee in calls:
+                    self._callers[callee].append(node)
+
+    @classmethod
+    def load(cls, root=_root, index_path=INDEX_FILE, rebuild=False):
+        """Обновляет индекс (только измененные файлы) и строит граф."""
+        index, stats = update_index(root, index_path, rebuild)
+        graph = cls(index)
+        graph.stats = stats
+        return graph
+
+    def resolve(self, name):
+        """
+        Узлы по имени: "Модуль.Процедура" или только "Процедура" (все модули, где она есть).
+        """
+        if name in self.nodes:
+            return [name]
+        return sorted(node for node in self.nodes if node.rsplit(".", 1)[1] == name)
+
+    def callees(self, node):
+        """Процедуры, которые вызывает node, в порядке первого вызова."""
+        return list(self._callees.get(node, ()))
+
+    def callers(self, node):
+        """Процедуры, которые вызывают node."""
+        return list(self._callers.get(node, ()))
+
+    def reachable(self, nodes, reverse=False):
+        """
+        Узлы, достижимые из nodes по вызовам (reverse=True — по обратным ребрам:
+        все, кто прямо или косвенно вызывает nodes). Включает сами nodes.
+        """
+        edges = self._callers if reverse else self._callees
+        seen = set(nodes)
+        stack = list(nodes)
+        while stack:
+            for nxt in edges.get(stack.pop(), ()):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return seen
+
+    def routines_at(self, module, lines):
+        """Узлы процедур модуля, содержащих строки lines (None — все процедуры модуля)."""
+        found = set()
+        for node in self.modules.get(module, {}).values():
+            info = self.nodes[node]
+            if lines is None or any(info["start"] <= line <= info["end"] for line in lines):
+                found.add(node)
+        return found
+
+    def dead_code(self, entry_points=()):
+        """
+        Процедуры общих модулей без вызовов.
+        Возвращает (неэкспортные без вызовов, экспортные без вызовов из BSL и Python).
+        Экспортные могут вызываться через COM и внешние скрипты, их нужно проверять вручную.
+        Модули форм и команд не проверяются: обработчики событий задаются в Form.xml.
+        """
+        entry_points = set(entry_points)
+        private, exported = [], []
+        for node, info in sorted(self.nodes.items()):
+            if "/" in info["module"] or self._callers[node]:
+                continue
+            if not info["export"]:
+                private.append(node)
+            elif node not in entry_points:
+                exported.append(node)
+        return private, exported
+
+
+def _format(graph, node):
+    info = graph.nodes[node]
+    export = " Экспорт" if info["export"] else ""
+    return f"{node}{export}  ({info['path']}:{info['start']})"
+
+
+def main():
+    from com_1c.com_connector import setup_console_encoding
+    setup_console_encoding()
+
+    import argparse
+    parser = argparse.ArgumentParser(description="Индекс графа вызовов BSL по выгрузке xml/")
+    parser.add_argument("command", choices=["stats", "callers", "callees", "dead"],
+                        help="stats — сводка; callers/callees — кто вызывает/что вызывает; dead — процедуры без вызовов")
+    parser.add_argument("name", nargs="?", default=None,
+                        help="Процедура: Модуль.Процедура или Процедура (для callers/callees)")
+    parser.add_argument("--all", action="store_true",
+                        help="Транзитивно: все прямые и косвенные вызывающие/вызываемые")
+    parser.add_argument("--index", default=INDEX_FILE, help=f"Файл индекса (по умолчанию {INDEX_FILE})")
+    parser.add_argument("--rebuild", action="store_true", help="Разобрать все файлы заново")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    graph = CallGraph.load(index_path=args.index, rebuild=args.rebuild)
+    load_ms = (time.perf_counter() - started) * 1000
+    stats = graph.stats
+
+    if args.command == "stats":
+        edges = sum(len(c) for c in graph._callees.values())
+        exported = sum(1 for info in graph.nodes.values() if info["export"])
+        print(f"Файлов: {len(graph.files)} (разобрано {stats['parsed']}, из индекса {stats['reused']}, "
+              f"удалено {stats['removed']}), загрузка {load_ms:.0f} мс")
+        print(f"Модулей: {len(graph.modules)}, процедур: {len(graph.nodes)} (экспортных {exported}), вызовов: {edges}")
+        return 0
+
+    if args.command == "dead":
+        private, exported = graph.dead_code(python_entry_points())
+        print(f"Неэкспортные процедуры без вызовов ({len(private)}):")
+        for node in private:
+            print(f"  {_format(graph, node)}")
+        print(f"Экспортные процедуры без вызовов из BSL и automation ({len(exported)}):")
+        for node in exported:
+            print(f"  {_format(graph, node)}")
+        return 0
+
+    if not args.name:
+        parser.error(f"{args.command}: укажите процедуру")
+    nodes = graph.resolve(args.name)
+    if not nodes:
+        print(f"Процедура не найдена: {args.name}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    reverse = args.command == "callers"
+    if args.all:
+        found = sorted(graph.reachable(nodes, reverse=reverse) - set(nodes))
+    else:
+        found = _unique(n for node in nodes for n in (graph.callers(node) if reverse else graph.callees(node)))
+    query_ms = (time.perf_counter() - started) * 1000
+
+    title = "Вызывающие" if reverse else "Вызываемые"
+    print(f"{title} {', '.join(nodes)}{' (транзитивно)' if args.all else ''}: {len(found)}, "
+          f"запрос {query_ms:.1f} мс")
+    for node in found:
+        print(f"  {_format(graph, node)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
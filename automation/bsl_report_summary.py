@@ -1,89 +1,330 @@
 #!/usr/bin/env python3
 """
 Извлекает из bsl-json.json краткий отчёт: файл, строка, серьёзность, код, сообщение.
+
+Отчёт BSL Language Server читается потоково: элементы fileinfos разбираются по одному,
+диагностики фильтруются по серьёзности и SKIP_PATHS сразу, поэтому память не зависит
+от размера bsl-json.json (на полной конфигурации — сотни МБ).
+
+Рядом с bsl-summary.txt сохраняются bsl-summary.json и bsl-summary.sarif (SARIF 2.1.0).
+С --baseline в текстовом отчёте только новые замечания относительно сохранённого baseline
+(bsl-summary.json прошлого прогона), код возврата 1 при новых замечаниях.
+
+Запуск (из каталога automation):
+    python bsl_report_summary.py                          # ошибки из logs/bsl-json.json
+    python bsl_report_summary.py --severity Warning       # ошибки и замечания
+    python bsl_report_summary.py --update-baseline        # сохранить текущие ошибки как baseline
+    python bsl_report_summary.py --baseline logs/bsl-baseline.json   # только новые ошибки
 """
 import json
 import sys
+from collections import Counter
 from pathlib import Path
-from urllib.parse import unquote, urlparse
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 SEVERITY_ORDER = {"Error": 1, "Warning": 2, "Information": 3, "Hint": 4}
 SEVERITY_LABEL = {"Error": "Ошибка", "Warning": "Замечание", "Information": "Информация", "Hint": "Подсказка"}
+SARIF_LEVEL = {"Error": "error", "Warning": "warning", "Information": "note", "Hint": "note"}
 SUMMARY_FILENAME = "bsl-summary.txt"
+SUMMARY_JSON_FILENAME = "bsl-summary.json"
+SUMMARY_SARIF_FILENAME = "bsl-summary.sarif"
+BASELINE_FILENAME = "bsl-baseline.json"
+
+# Файл со справкой по запросам — текст для ИИ, не исполняемый код; ложные срабатывания исключаем
+SKIP_PATHS = ("ИИА_СправкаЗапросы1С",)
+
+CHUNK_SIZE = 1 << 20
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
 
 
-def short_path(uri: str) -> str:
-    """Сокращает file:///path/.../xml/.../Module.bsl до xml/.../Module.bsl"""
+def short_path(uri: str, root=REPO_ROOT) -> str:
+    """
+    Сокращает file:///path/.../xml/.../Module.bsl до пути от корня выгрузки root (xml/.../Module.bsl).
+    Пути вне root и не-file URI возвращаются без изменений.
+    """
     if uri.startswith("file:///"):
-        p = Path(unquote(urlparse(uri).path))
-        parts = p.parts
-        for i, part in enumerate(parts):
-            if part == "xml" and i + 1 < len(parts):
-                return "/".join(parts[i:])
+        p = Path(url2pathname(urlparse(uri).path)).resolve()
+        try:
+            return p.relative_to(Path(root).resolve()).as_posix()
+        except ValueError:
+            pass
     return uri
 
 
-def main():
-    script_dir = Path(__file__).resolve().parent
-    logs_dir = script_dir / "logs"
-    json_path = logs_dir / "bsl-json.json"
+class _StreamReader:
+    """Потоковое чтение JSON-текста: буфер дочитывается из файла по мере разбора."""
 
-    if not json_path.exists():
-        print(f"Ошибка: {json_path} не найден. Запустите анализ с --reporter json.", file=sys.stderr)
-        sys.exit(1)
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
 
-    with open(json_path, encoding="utf-8") as f:
-        data = json.load(f)
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Разобранное начало буфера больше не нужно
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
 
-    lines = [
-        f"BSL-анализ: {data.get('date', '?')}",
-        "",
-    ]
+    def peek(self):
+        """Следующий значащий символ (пробелы пропускаются) или "" в конце файла."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
 
-    # Файл со справкой по запросам — текст для ИИ, не исполняемый код; ложные срабатывания исключаем
-    SKIP_PATHS = ("ИИА_СправкаЗапросы1С",)
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"ожидался '{char}', получено '{found or 'конец файла'}'")
+        self.pos += 1
 
-    counts = {"Error": 0, "Warning": 0, "Information": 0, "Hint": 0}
-    for fileinfo in data.get("fileinfos", []):
-        path = fileinfo.get("path", "")
-        mdo_ref = fileinfo.get("mdoRef", "")
-        diags = fileinfo.get("diagnostics", [])
+    def value(self):
+        """Очередное JSON-значение целиком."""
+        self.peek()
+        while True:
+            try:
+                result, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # Число на границе буфера может продолжаться в следующем блоке
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return result
 
-        if not diags:
-            continue
 
-        # Только ошибки; замечания в саммари не включаем
-        relevant = [d for d in diags if d.get("severity") == "Error"]
+def iter_report(path):
+    """
+    Потоково читает отчёт BSL LS {"date": ..., "fileinfos": [...], ...}.
+    Выдаёт ("fileinfo", элемент) для каждого файла и ("header", {ключ: значение}) в конце
+    для остальных полей верхнего уровня.
+    """
+    header = {}
+    with open(path, encoding="utf-8-sig") as f:
+        reader = _StreamReader(f)
+        reader.expect("{")
+        while reader.peek() != "}":
+            key = reader.value()
+            reader.expect(":")
+            if key == "fileinfos" and reader.peek() == "[":
+                reader.expect("[")
+                while reader.peek() != "]":
+                    yield "fileinfo", reader.value()
+                    if reader.peek() == ",":
+                        reader.expect(",")
+                reader.expect("]")
+            else:
+                header[key] = reader.value()
+            if reader.peek() == ",":
+                reader.expect(",")
+        reader.expect("}")
+    yield "header", header
+
+
+def collect_issues(json_path, min_severity="Error"):
+    """
+    Диагностики серьёзности не ниже min_severity, кроме файлов из SKIP_PATHS.
+    Возвращает (поля заголовка отчёта, список замечаний в порядке файлов и строк).
+    """
+    limit = SEVERITY_ORDER[min_severity]
+    issues = []
+    header = {}
+    for kind, item in iter_report(json_path):
+        if kind == "header":
+            header = item
+            continue
+        path = item.get("path", "")
         # Пропускаем файлы со справкой (текст для ИИ)
         if any(skip in path for skip in SKIP_PATHS):
             continue
-        if not relevant:
-            continue
-        short = short_path(path)
-        lines.append(f"── {short} ({mdo_ref})")
-        for d in sorted(relevant, key=lambda x: (SEVERITY_ORDER.get(x.get("severity", "Hint"), 5), x.get("range", {}).get("start", {}).get("line", 0))):
-            sev = d.get("severity", "Hint")
-            code = d.get("code", "?")
-            msg = d.get("message", "")
-            sev_ru = SEVERITY_LABEL.get(sev, sev)
-            r = d.get("range", {}).get("start", {})
-            line = r.get("line", 0) + 1
-            col = r.get("character", 0) + 1
-            lines.append(f"   {line}:{col}  [{sev_ru}] {code}: {msg}")
-            counts[sev] = counts.get(sev, 0) + 1
+        relevant = [
+            d for d in item.get("diagnostics") or []
+            if SEVERITY_ORDER.get(d.get("severity", "Hint"), 5) <= limit
+        ]
+        relevant.sort(key=lambda x: (SEVERITY_ORDER.get(x.get("severity", "Hint"), 5), x.get("range", {}).get("start", {}).get("line", 0)))
+        for d in relevant:
+            start = d.get("range", {}).get("start", {})
+            end = d.get("range", {}).get("end", {})
+            issues.append({
+                "path": short_path(path),
+                "mdoRef": item.get("mdoRef", ""),
+                "line": start.get("line", 0) + 1,
+                "column": start.get("character", 0) + 1,
+                "endLine": end.get("line", start.get("line", 0)) + 1,
+                "endColumn": end.get("character", start.get("character", 0)) + 1,
+                "severity": d.get("severity", "Hint"),
+                "code": d.get("code", "?"),
+                "message": d.get("message", ""),
+            })
+    return header, issues
+
+
+def _issue_key(issue):
+    # Без номера строки: правки выше по файлу сдвигают строки существующих замечаний
+    return issue["path"], issue["code"], issue["message"]
+
+
+def mark_new(issues, baseline_issues):
+    """
+    Отмечает issue["new"]: замечание новое, если одинаковых (файл, код, сообщение)
+    в текущем отчёте больше, чем в baseline.
+    """
+    remaining = Counter(_issue_key(i) for i in baseline_issues)
+    for issue in issues:
+        key = _issue_key(issue)
+        issue["new"] = remaining[key] <= 0
+        remaining[key] -= 1
+
+
+def format_summary(date, issues, baseline_path=None):
+    """Текстовый отчёт bsl-summary.txt; с baseline — только новые замечания."""
+    lines = [
+        f"BSL-анализ: {date}",
+        "",
+    ]
+    shown = [i for i in issues if i.get("new", True)]
+    current = None
+    for issue in shown:
+        if issue["path"] != current:
+            if current is not None:
+                lines.append("")
+            current = issue["path"]
+            lines.append(f"── {issue['path']} ({issue['mdoRef']})")
+        sev_ru = SEVERITY_LABEL.get(issue["severity"], issue["severity"])
+        lines.append(f"   {issue['line']}:{issue['column']}  [{sev_ru}] {issue['code']}: {issue['message']}")
+    if shown:
         lines.append("")
 
-    total = counts.get("Error", 0)
+    counts = Counter(i["severity"] for i in shown)
     lines.append("─" * 50)
-    if total:
-        lines.append(f"Ошибка: {total}")
-    lines.append(f"Всего: {total}")
+    for severity in sorted(counts, key=lambda s: SEVERITY_ORDER.get(s, 5)):
+        lines.append(f"{SEVERITY_LABEL.get(severity, severity)}: {counts[severity]}")
+    if baseline_path is not None:
+        lines.append(f"Новых относительно {baseline_path}: {len(shown)} (всего {len(issues)})")
+    else:
+        lines.append(f"Всего: {len(shown)}")
+    return "\n".join(lines)
+
+
+def to_sarif(issues):
+    """Замечания в формате SARIF 2.1.0 (baselineState — при сравнении с baseline)."""
+    rules = sorted({i["code"] for i in issues})
+    results = []
+    for issue in issues:
+        result = {
+            "ruleId": issue["code"],
+            "level": SARIF_LEVEL.get(issue["severity"], "note"),
+            "message": {"text": issue["message"]},
+            "locations": [{
+                "physicalLocation": {
+                    "artifactLocation": {"uri": issue["path"]},
+                    "region": {
+                        "startLine": issue["line"],
+                        "startColumn": issue["column"],
+                        "endLine": issue["endLine"],
+                        "endColumn": issue["endColumn"],
+                    },
+                },
+            }],
+        }
+        if "new" in issue:
+            result["baselineState"] = "new" if issue["new"] else "unchanged"
+        results.append(result)
+    return {
+        "version": "2.1.0",
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "runs": [{
+            "tool": {"driver": {
+                "name": "BSL Language Server",
+                "informationUri": "https://github.com/1c-syntax/bsl-language-server",
+                "rules": [{"id": code} for code in rules],
+            }},
+            "results": results,
+        }],
+    }
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def main():
+    import argparse
+
+    script_dir = Path(__file__).resolve().parent
+    logs_dir = script_dir / "logs"
+
+    parser = argparse.ArgumentParser(description="Краткий отчёт по bsl-json.json (BSL Language Server)")
+    parser.add_argument("--input", "-i", default=str(logs_dir / "bsl-json.json"),
+                        help="Отчёт BSL LS в формате json (по умолчанию logs/bsl-json.json)")
+    parser.add_argument("--out-dir", default=str(logs_dir),
+                        help="Каталог для bsl-summary.txt/.json/.sarif (по умолчанию logs)")
+    parser.add_argument("--severity", choices=list(SEVERITY_ORDER), default="Error",
+                        help="Минимальная серьёзность (по умолчанию Error — только ошибки)")
+    parser.add_argument("--baseline", nargs="?", const=str(logs_dir / BASELINE_FILENAME), default=None,
+                        help=f"Показать только новые замечания относительно baseline (по умолчанию logs/{BASELINE_FILENAME})")
+    parser.add_argument("--update-baseline", nargs="?", const=str(logs_dir / BASELINE_FILENAME), default=None,
+                        metavar="BASELINE",
+                        help=f"Сохранить текущие замечания как baseline (по умолчанию logs/{BASELINE_FILENAME})")
+    args = parser.parse_args()
 
-    out_path = logs_dir / SUMMARY_FILENAME
+    json_path = Path(args.input)
+    if not json_path.exists():
+        print(f"Ошибка: {json_path} не найден. Запустите анализ с --reporter json.", file=sys.stderr)
+        return 1
+
+    try:
+        header, issues = collect_issues(json_path, args.severity)
+    except ValueError as e:
+        print(f"Ошибка разбора {json_path}: {e}", file=sys.stderr)
+        return 1
+    date = header.get("date", "?")
+
+    if args.baseline:
+        try:
+            with open(args.baseline, encoding="utf-8") as f:
+                mark_new(issues, json.load(f).get("issues", []))
+        except (OSError, ValueError) as e:
+            print(f"Ошибка чтения baseline {args.baseline}: {e}", file=sys.stderr)
+            return 1
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / SUMMARY_FILENAME
     with open(out_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+        f.write(format_summary(date, issues, args.baseline))
+
+    summary = {
+        "date": date,
+        "severity": args.severity,
+        "baseline": args.baseline,
+        "counts": dict(Counter(i["severity"] for i in issues)),
+        "new": sum(1 for i in issues if i.get("new")) if args.baseline else None,
+        "issues": issues,
+    }
+    _write_json(out_dir / SUMMARY_JSON_FILENAME, summary)
+    _write_json(out_dir / SUMMARY_SARIF_FILENAME, to_sarif(issues))
+    if args.update_baseline:
+        _write_json(args.update_baseline, {"date": date, "severity": args.severity, "issues": issues})
 
     print(out_path)
+    if args.baseline and summary["new"]:
+        return 1
     return 0
 
 
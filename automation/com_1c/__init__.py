@@ -16,6 +16,7 @@ from .com_connector import (
     create_query,
     execute_query,
     safe_getattr,
+    com_array,
     call_if_callable,
     setup_console_encoding,
     get_enum_value,
@@ -30,6 +31,7 @@ __all__ = [
     "create_query",
     "execute_query",
     "safe_getattr",
+    "com_array",
     "call_if_callable",
     "setup_console_encoding",
     "get_enum_value",
@@ -81,6 +81,15 @@ def safe_getattr(obj, attr_name: str, default=None):
         return default
 
 
+def com_array(value) -> list:
+    """Преобразует массив 1С (COM) в список Python."""
+    if value is None:
+        return []
+    if hasattr(value, "Count") and hasattr(value, "Get"):
+        return [value.Get(i) for i in range(value.Count())]
+    return list(value)
+
+
 def _xml_type_name(com_object, value) -> str:
     type_info = None
     xml_type_method = safe_getattr(com_object, "XMLТип", None)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Локальный стенд OpenAI-совместимого /chat/completions с потоковым ответом (SSE).
+
+Отдаёт ответ модели фрагментами "data: {choices: [{delta: {content}}]}" с задержкой между
+событиями: сначала DSL JSON, затем длинный хвост пояснений (имитация долгой генерации).
+По нему проверяется потоковый режим ИИА_Провайдеры: DSL должен распознаваться сразу после
+закрывающей скобки JSON, а соединение — закрываться до конца хвоста. Обрыв соединения клиентом
+фиксируется в статистике (GET /stats). Запрос без "stream": true получает обычный JSON-ответ.
+
+Запись статистики создаётся в начале потока, получает номер (id) и обновляется после каждого
+фрагмента; finished = true — поток завершён. GET /stats?after=N&wait_ms=M ждёт до M мс, пока
+не завершится поток с номером больше N: так клиент читает итог своего запроса без гонки со стендом.
+
+В настройках пользователя 1С укажите Provider_BaseUrl = http://127.0.0.1:8766/v1 (ключ — любой).
+
+Запуск (из каталога automation):
+    python llm_stream_stub.py                              # порт 8766, DSL ShowInfo + хвост ~3 с
+    python llm_stream_stub.py --delay-ms 50 --tail 300     # медленнее и длиннее
+    python llm_stream_stub.py --reply reply.txt            # свой текст ответа модели
+    python run_tests.py --test ТестПотоковыйОтветLLM       # тест 1С против стенда
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+if _script_dir not in sys.path:
+    sys.path.insert(0, _script_dir)
+
+DEFAULT_PORT = 8766
+DEFAULT_REPLY = (
+    '```json\n'
+    '{"dsl_version": 2, "steps": [{"action": "ShowInfo", "text": "Ответ стенда: скобки { } в строке не мешают разбору"}]}\n'
+    '```\n'
+)
+TAIL_PHRASE = "Пояснение к сценарию, которое модель продолжает генерировать после DSL. "
+MAX_STATS = 50
+
+
+def split_chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def sse_event(payload):
+    return ("data: " + json.dumps(payload, ensure_ascii=False) + "\n\n").encode("utf-8")
+
+
+def chunk_payload(content=None, usage=None, finish_reason=None):
+    payload = {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "model": "stub",
+        "choices": [{"index": 0, "delta": {} if content is None else {"content": content},
+                     "finish_reason": finish_reason}],
+    }
+    if usage is not None:
+        payload["usage"] = usage
+    return payload
+
+
+class StubState:
+    """Ответ стенда и статистика обработанных запросов."""
+
+    def __init__(self, reply, tail, chunk_size, delay_ms):
+        self.reply = reply
+        self.tail = tail
+        self.chunk_size = chunk_size
+        self.delay = delay_ms / 1000
+        self.changed = threading.Condition()
+        self.requests = []
+        self.last_id = 0
+
+    def chunks(self):
+        return split_chunks(self.reply, self.chunk_size) + split_chunks(TAIL_PHRASE * self.tail, self.chunk_size)
+
+    def record(self, chunks_total):
+        """Создаёт запись потока в начале ответа; дальше её обновляет update."""
+        with self.changed:
+            self.last_id += 1
+            entry = {"id": self.last_id, "chunks_total": chunks_total, "chunks_sent": 0,
+                     "client_aborted": False, "elapsed_ms": 0, "finished": False}
+            self.requests.append(entry)
+            del self.requests[:-MAX_STATS]
+            return entry
+
+    def update(self, entry, **fields):
+        with self.changed:
+            entry.update(fields)
+            self.changed.notify_all()
+
+    def stats(self, after=None, wait_ms=0):
+        """Снимок статистики; с after — ждёт до wait_ms завершения потока с номером больше after."""
+        def ready():
+            return any(r["id"] > after and r["finished"] for r in self.requests)
+
+        with self.changed:
+            if after is not None and wait_ms > 0:
+                self.changed.wait_for(ready, timeout=wait_ms / 1000)
+            return {"last_id": self.last_id, "requests": [dict(r) for r in self.requests]}
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, payload, status=200):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path.rstrip("/") == "/stats":
+                query = parse_qs(url.query)
+                try:
+                    after = int(query["after"][0]) if "after" in query else None
+                    wait_ms = int(query.get("wait_ms", ["0"])[0])
+                except ValueError:
+                    return self._send_json({"error": "after и wait_ms должны быть числами"}, 400)
+                return self._send_json(state.stats(after, min(max(wait_ms, 0), 30000)))
+            self._send_json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._send_json({"error": "not found"}, 404)
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                return self._send_json({"error": "тело запроса должно быть JSON"}, 400)
+            chunks = state.chunks()
+            usage = {"prompt_tokens": 100, "completion_tokens": len(chunks), "total_tokens": 100 + len(chunks)}
+            if not request.get("stream"):
+                return self._send_json({
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(chunks)},
+                                 "finish_reason": "stop"}],
+                    "usage": usage,
+                })
+            self._stream(chunks, usage)
+
+        def _stream(self, chunks, usage):
+            started = time.perf_counter()
+            entry = state.record(len(chunks))
+            sent = 0
+            disconnected = False
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            try:
+                for content in chunks:
+                    self.wfile.write(sse_event(chunk_payload(content)))
+                    self.wfile.flush()
+                    sent += 1
+                    state.update(entry, chunks_sent=sent)
+                    time.sleep(state.delay)
+                self.wfile.write(sse_event(chunk_payload(finish_reason="stop", usage=usage)))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+                disconnected = True
+            self.close_connection = True
+            state.update(entry, client_aborted=disconnected, finished=True,
+                         elapsed_ms=round((time.perf_counter() - started) * 1000))
+            self.log_message("stream: отправлено %d из %d фрагментов за %d мс%s", sent, len(chunks),
+                             entry["elapsed_ms"], ", клиент закрыл соединение" if disconnected else "")
+
+    return Handler
+
+
+def main():
+    from com_1c.com_connector import setup_console_encoding
+    setup_console_encoding()
+
+    import argparse
+    parser = argparse.ArgumentParser(description="Локальный стенд /chat/completions с потоковым ответом (SSE)")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес стенда (по умолчанию 127.0.0.1)")
+    parser.add_argument("--port", "-p", type=int, default=DEFAULT_PORT, help=f"Порт стенда (по умолчанию {DEFAULT_PORT})")
+    parser.add_argument("--reply", default=None, help="Файл с текстом ответа модели (по умолчанию DSL ShowInfo)")
+    parser.add_argument("--tail", type=int, default=40,
+                        help="Сколько раз повторить пояснение после DSL (по умолчанию 40)")
+    parser.add_argument("--chunk", type=int, default=16, help="Символов в одном событии SSE (по умолчанию 16)")
+    parser.add_argument("--delay-ms", type=int, default=20, help="Задержка между событиями, мс (по умолчанию 20)")
+    args = parser.parse_args()
+
+    reply = DEFAULT_REPLY
+    if args.reply:
+        with open(args.reply, encoding="utf-8") as f:
+            reply = f.read()
+    state = StubState(reply, max(args.tail, 0), max(args.chunk, 1), max(args.delay_ms, 0))
+    chunks = state.chunks()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"Стенд SSE: http://{args.host}:{args.port}/v1/chat/completions — {len(chunks)} фрагментов, "
+          f"полный ответ ~{len(chunks) * args.delay_ms / 1000:.1f} с", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
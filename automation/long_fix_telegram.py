@@ -105,7 +105,7 @@ def run_update_1c():
             env={**os.environ},
         )
         return r.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError, Exception):
+    except (subprocess.SubprocessError, OSError):  # таймаут, нет интерпретатора или скрипта
         return False
 
 
@@ -129,6 +129,36 @@ def run_tests(examples_arg=None):
     return result.returncode, run_id, report_path
 
 
+def run_impacted_unit_tests():
+    """
+    Запускает тесты ИИА_Тесты, затронутые незакоммиченными правками (run_tests.py --changed).
+    БД к этому моменту уже обновлена. Возвращает True, если провалов нет.
+    """
+    cmd = [sys.executable, os.path.join(_script_dir, "run_tests.py"), "--changed", "--skip-update", "--durations", "0"]
+    try:
+        result = subprocess.run(cmd, cwd=_script_dir, env={**os.environ}, timeout=1800)
+        return result.returncode == 0
+    except (subprocess.SubprocessError, OSError):  # таймаут, нет интерпретатора или скрипта
+        return False
+
+
+def notify_impacted_unit_tests(db_updated=True):
+    """
+    Запускает затронутые правками тесты ИИА_Тесты и сообщает о провалах в Telegram.
+    Если обновление БД не удалось, тесты не запускаются: они шли бы против старой конфигурации.
+    """
+    if not db_updated:
+        print("Ошибка обновления БД: тесты ИИА_Тесты, затронутые правками, пропущены", file=sys.stderr)
+        send_telegram_notification(
+            "<b>Ошибка обновления БД</b>: тесты ИИА_Тесты, затронутые правками, пропущены "
+            "(python update_1c.py --skip-run-client)"
+        )
+        return
+    print("Тесты ИИА_Тесты, затронутые правками...")
+    if not run_impacted_unit_tests():
+        send_telegram_notification("<b>Провалы в тестах ИИА_Тесты</b>, затронутых правками (run_tests.py --changed)")
+
+
 def load_report(report_path):
     with open(report_path, "r", encoding="utf-8") as f:
         return json.load(f)
@@ -145,11 +175,39 @@ def get_failed_and_passed(report):
     return failed, passed
 
 
+def write_callgraph_summary(log_dir):
+    """
+    Сохраняет в log_dir сводку графа вызовов BSL (bsl_callgraph.py): для каждой процедуры
+    общих модулей — кто ее вызывает. Возвращает путь к файлу или None.
+    """
+    try:
+        from bsl_callgraph import CallGraph
+        graph = CallGraph.load()
+    except (OSError, ValueError):
+        return None
+    path = os.path.join(log_dir, "callgraph.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Процедура (файл:строка) <- вызывающие процедуры\n")
+        for node, info in sorted(graph.nodes.items()):
+            if "/" in info["module"]:
+                continue
+            export = " Экспорт" if info["export"] else ""
+            callers = ", ".join(graph.callers(node)) or "-"
+            f.write(f"{node}{export} ({info['path']}:{info['start']}) <- {callers}\n")
+    return path
+
+
 def run_cursor_analyze(run_id, report_path, log_dir):
     """Запускает Cursor CLI для анализа логов. Возвращает stdout."""
+    callgraph_path = write_callgraph_summary(log_dir)
+    callgraph_hint = (
+        f"Граф вызовов BSL: {callgraph_path} (процедура, файл:строка, кто ее вызывает). "
+        f"Перед правкой процедуры проверь вызывающих, чтобы правка не сломала другие сценарии.\n"
+        if callgraph_path else ""
+    )
     prompt = f"""Проанализируй логи тестов в каталоге {log_dir}.
 Файл report.json: {report_path}
-Тест провален, если в логе нет блока "=== РЕЗЮМЕ ВЫПОЛНЕННОЙ РАБОТЫ ===" или в тексте резюме нет слов подтверждения (выполнен, успешно, создан, найден и т.п.).
+{callgraph_hint}Тест провален, если в логе нет блока "=== РЕЗЮМЕ ВЫПОЛНЕННОЙ РАБОТЫ ===" или в тексте резюме нет слов подтверждения (выполнен, успешно, создан, найден и т.п.).
 
 КРИТИЧЕСКИ ВАЖНО: Выведи ТОЛЬКО предложения правок в указанном формате. Без markdown, без таблиц, без вступления.
 Каждое предложение — конкретная правка BSL-кода с unified diff.
@@ -380,9 +438,11 @@ def cmd_run(args):
         send_telegram_notification(tg_msg)
 
         # Обновление БД и запуск тестов после правок
+        db_updated = True
         if not getattr(args, "skip_update", False):
             print("Обновление расширения и БД...")
-            run_update_1c()
+            db_updated = run_update_1c()
+        notify_impacted_unit_tests(db_updated)
         print("Запуск тестов после правок...")
         rc, new_run_id, new_report_path = run_tests(examples_arg)
         if new_report_path:
@@ -517,9 +577,11 @@ def cmd_run_from(args):
         tg_msg += f"Изменённые файлы:\n<pre>{git_status[:1500]}</pre>\n\n"
     send_telegram_notification(tg_msg)
 
+    db_updated = True
     if not getattr(args, "skip_update", False):
         print("Обновление расширения и БД...")
-        run_update_1c()
+        db_updated = run_update_1c()
+    notify_impacted_unit_tests(db_updated)
     print("Запуск тестов после правок...")
     rc, new_run_id, new_report_path = run_tests()
     if new_report_path:
@@ -598,9 +660,11 @@ def cmd_apply(args):
         tg_msg += f"Изменённые файлы:\n<pre>{git_status[:1500]}</pre>\n\n"
     send_telegram_notification(tg_msg)
 
+    db_updated = True
     if not getattr(args, "skip_update", False):
         print("Обновление расширения и БД...")
-        run_update_1c()
+        db_updated = run_update_1c()
+    notify_impacted_unit_tests(db_updated)
     print("Запуск тестов после правок...")
     rc, new_run_id, new_report_path = run_tests()
     if new_report_path:
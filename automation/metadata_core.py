@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Снимок ядра метаданных (ИИА_ЯдроМетаданных) для Python-инструментов.
+
+Ядра всех известных конфигураций выгружаются из 1С через COM (ИИА_ЯдроМетаданных.ПолучитьЯдроJSON)
+в файл и дальше используются без подключения к базе: проверка «объект в ядре», список объектов ядра.
+Файл содержит версию ядра (ИИА_ЯдроМетаданных.ВерсияЯдра); после изменения списков пар ядра
+в 1С его нужно выгрузить заново.
+
+Запуск (из каталога automation):
+    python metadata_core.py --export metadata_core.json
+    python metadata_core.py --core metadata_core.json --list
+    python metadata_core.py --core metadata_core.json --config UNF Document.ПриходнаяНакладная Catalog.Номенклатура
+
+Использование из кода:
+    from metadata_core import MetadataCore
+    core = MetadataCore.load("metadata_core.json")
+    core.in_core("UT", "Document", "РеализацияТоваровУслуг")
+"""
+
+import sys
+import os
+import json
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+if _script_dir not in sys.path:
+    sys.path.insert(0, _script_dir)
+
+DEFAULT_CORE_FILE = "metadata_core.json"
+# ИИА_ЯдроМетаданных.ОбъектВЯдре: для нераспознанной конфигурации используется набор Unknown
+FALLBACK_CONFIG_ID = "Unknown"
+
+
+class MetadataCore:
+    """Неизменяемые множества объектов ядра по идентификаторам конфигураций."""
+
+    def __init__(self, data: dict):
+        self.version = data.get("version")
+        self.config_name = data.get("config_name", "")
+        self.config_id = data.get("config_id", "")
+        self.configs = {
+            config_id: frozenset(keys or [])
+            for config_id, keys in (data.get("configs") or {}).items()
+        }
+
+    @classmethod
+    def load(cls, path: str) -> "MetadataCore":
+        with open(path, encoding="utf-8-sig") as f:
+            return cls(json.load(f))
+
+    def objects(self, config_id: str = None) -> frozenset:
+        """Ключи "Тип|Имя" ядра конфигурации (по умолчанию — конфигурации выгрузившей базы)."""
+        config_id = config_id or self.config_id
+        if config_id in self.configs:
+            return self.configs[config_id]
+        return self.configs.get(FALLBACK_CONFIG_ID, frozenset())
+
+    def in_core(self, config_id: str, object_type: str, name: str) -> bool:
+        """ИИА_ЯдроМетаданных.ОбъектВЯдре по идентификатору конфигурации."""
+        if not name:
+            return False
+        return f"{object_type}|{name}" in self.objects(config_id)
+
+
+def export_core(conn, path: str) -> MetadataCore:
+    """Выгружает ядра конфигураций из 1С в файл и возвращает загруженный снимок."""
+    from com_1c import call_procedure
+
+    json_str = call_procedure(conn, "ИИА_ЯдроМетаданных", "ПолучитьЯдроJSON")
+    if not isinstance(json_str, str) or not json_str:
+        raise RuntimeError("ПолучитьЯдроJSON вернула пустой результат")
+    data = json.loads(json_str)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return MetadataCore(data)
+
+
+def _split_object(value: str):
+    """"Document.ЧекККМ" или "Document|ЧекККМ" -> ("Document", "ЧекККМ")."""
+    for separator in ("|", "."):
+        if separator in value:
+            object_type, name = value.split(separator, 1)
+            return object_type, name
+    return "", value
+
+
+def main():
+    from com_1c.com_connector import setup_console_encoding
+    setup_console_encoding()
+
+    import argparse
+    parser = argparse.ArgumentParser(description="Снимок ядра метаданных (ИИА_ЯдроМетаданных) для Python-инструментов")
+    parser.add_argument("objects", nargs="*", help="Объекты для проверки: Тип.Имя (например Document.ЧекККМ)")
+    parser.add_argument("--export", metavar="FILE", default=None,
+                        help="Выгрузить ядра конфигураций из 1С через COM в файл и выйти")
+    parser.add_argument("--connection", "-c", default=None, help="Строка подключения к 1С (для --export)")
+    parser.add_argument("--core", default=DEFAULT_CORE_FILE,
+                        help=f"Файл снимка ядра (по умолчанию {DEFAULT_CORE_FILE})")
+    parser.add_argument("--config", default=None,
+                        help="Идентификатор конфигурации: UT, ERP, Roznica, BP, UNF, Test, Unknown "
+                             "(по умолчанию — конфигурация выгрузившей базы)")
+    parser.add_argument("--list", action="store_true", help="Вывести объекты ядра конфигурации")
+    args = parser.parse_args()
+
+    if args.export:
+        from com_1c import connect_to_1c
+        from com_1c.config import get_connection_string
+
+        conn = connect_to_1c(get_connection_string(args.connection))
+        if conn is None:
+            print("Ошибка: не удалось подключиться к 1С.", file=sys.stderr)
+            return 1
+        try:
+            core = export_core(conn, args.export)
+        except Exception as e:
+            print(f"Ошибка выгрузки ядра: {e}", file=sys.stderr)
+            return 1
+        sizes = ", ".join(f"{config_id} {len(keys)}" for config_id, keys in core.configs.items())
+        print(f"Ядро версии {core.version} выгружено в {args.export}: {sizes}; "
+              f"текущая база {core.config_name} -> {core.config_id}")
+        return 0
+
+    try:
+        core = MetadataCore.load(args.core)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка загрузки снимка ядра {args.core}: {e}", file=sys.stderr)
+        return 1
+
+    config_id = args.config or core.config_id
+    print(f"Ядро версии {core.version}, конфигурация {config_id}: объектов {len(core.objects(config_id))}")
+    if args.list:
+        for key in sorted(core.objects(config_id)):
+            print(f"  {key.replace('|', '.')}")
+
+    missing = 0
+    for value in args.objects:
+        object_type, name = _split_object(value)
+        found = core.in_core(config_id, object_type, name)
+        missing += 0 if found else 1
+        print(f"  {value}: {'в ядре' if found else 'нет в ядре'}")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Профиль сборки промптов по логу диалога.
+
+Разбирает строки [LLM_REQUEST] (поля PromptChars, PromptBuildMs, ExpectedResponseFormat)
+и относит каждый вызов ИИ к стадии оркестратора — ближайшей следующей метрике [OBSERVE] stage=...
+Выводит по стадиям: число вызовов, время сборки промпта и размер промпта.
+С --series дополнительно печатает вызовы по порядку и рост промпта по ходу диалога
+(средний размер в первой и последней трети вызовов) — для проверки сжатия контекста на длинных диалогах.
+
+Лог берётся из файлов (run_dialog.py --log-file, файл ПутьКЛогуОтладки) или из нового диалога,
+запущенного через COM (--text).
+
+Запуск (из каталога automation):
+    python prompt_profile.py run_log.txt
+    python prompt_profile.py D:\\logs\\debug.log --json
+    python prompt_profile.py --text "Покажи всех контрагентов" --type Agent
+    python prompt_profile.py long_run_log.txt --series
+"""
+
+import sys
+import os
+import re
+import json
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+if _script_dir not in sys.path:
+    sys.path.insert(0, _script_dir)
+
+# Префиксы [LLM_REQUEST]/[OBSERVE] в регистре логов отрезаются, поэтому допускаем оба варианта
+LLM_REQUEST_RE = re.compile(r"^(?:\[LLM_REQUEST\]\s*)?CallId=[^,\s]+,\s*Type=.*?ExpectedResponseFormat=([^,\s]+)")
+OBSERVE_RE = re.compile(r"^(?:\[OBSERVE\]\s*)?stage=([^,\s]+),\s*success=")
+PROMPT_CHARS_RE = re.compile(r"PromptChars=(\d+)")
+PROMPT_BUILD_MS_RE = re.compile(r"PromptBuildMs=(\d+)")
+
+
+def parse_log(text: str) -> list:
+    """Возвращает список вызовов ИИ: {format, stage, chars, build_ms}.
+    Стадия назначается по первой строке [OBSERVE] после вызова; без неё — "unknown"."""
+    calls = []
+    pending = []
+    for line in text.splitlines():
+        line = line.strip()
+        m = LLM_REQUEST_RE.match(line)
+        if m:
+            chars = PROMPT_CHARS_RE.search(line)
+            build_ms = PROMPT_BUILD_MS_RE.search(line)
+            call = {
+                "format": m.group(1),
+                "stage": "unknown",
+                "chars": int(chars.group(1)) if chars else None,
+                "build_ms": int(build_ms.group(1)) if build_ms else None,
+            }
+            calls.append(call)
+            pending.append(call)
+            continue
+        m = OBSERVE_RE.match(line)
+        if m and pending:
+            for call in pending:
+                call["stage"] = m.group(1)
+            pending = []
+    return calls
+
+
+def summarize(calls: list) -> list:
+    """Агрегирует вызовы по (стадия, формат ответа)."""
+    groups = {}
+    for call in calls:
+        key = (call["stage"], call["format"])
+        groups.setdefault(key, []).append(call)
+
+    rows = []
+    for (stage, fmt), items in sorted(groups.items()):
+        chars = [c["chars"] for c in items if c["chars"] is not None]
+        build = [c["build_ms"] for c in items if c["build_ms"] is not None]
+        rows.append({
+            "stage": stage,
+            "format": fmt,
+            "calls": len(items),
+            "build_ms_avg": round(sum(build) / len(build), 1) if build else None,
+            "build_ms_max": max(build) if build else None,
+            "chars_avg": round(sum(chars) / len(chars)) if chars else None,
+            "chars_max": max(chars) if chars else None,
+            "chars_total": sum(chars) if chars else None,
+        })
+    return rows
+
+
+def print_table(rows: list) -> None:
+    if not rows:
+        print("Вызовов ИИ в логе не найдено.")
+        return
+
+    def fmt(value):
+        return "-" if value is None else str(value)
+
+    header = ["stage", "format", "calls", "build_ms_avg", "build_ms_max", "chars_avg", "chars_max", "chars_total"]
+    table = [header] + [[fmt(r[h]) for h in header] for r in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+    for index, row in enumerate(table):
+        print("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip())
+        if index == 0:
+            print("  ".join("-" * w for w in widths))
+
+
+def growth(calls: list) -> dict:
+    """Сравнивает средний размер промпта в первой и последней трети вызовов."""
+    sizes = [c["chars"] for c in calls if c["chars"] is not None]
+    if len(sizes) < 3:
+        return {}
+    third = len(sizes) // 3
+    head = sum(sizes[:third]) / third
+    tail = sum(sizes[-third:]) / third
+    return {
+        "calls": len(sizes),
+        "chars_first_third_avg": round(head),
+        "chars_last_third_avg": round(tail),
+        "growth_ratio": round(tail / head, 2) if head else None,
+    }
+
+
+def print_series(calls: list) -> None:
+    for index, call in enumerate(calls, 1):
+        chars = "-" if call["chars"] is None else call["chars"]
+        build_ms = "-" if call["build_ms"] is None else call["build_ms"]
+        print(f"{index:>4}  {call['stage']:<10} {call['format']:<16} chars={chars} build_ms={build_ms}")
+    summary = growth(calls)
+    if summary:
+        print()
+        print(
+            f"Рост промпта: первая треть {summary['chars_first_third_avg']} симв., "
+            f"последняя треть {summary['chars_last_third_avg']} симв. (x{summary['growth_ratio']})"
+        )
+
+
+def run_dialog_log(text: str, dialog_type: str, user: str, connection: str) -> str:
+    """Создаёт диалог через COM, выполняет агента синхронно и возвращает лог."""
+    from com_1c import connect_to_1c, call_procedure, get_enum_value
+    from com_1c.config import get_connection_string
+
+    conn = connect_to_1c(get_connection_string(connection))
+    if not conn:
+        raise RuntimeError("не удалось подключиться к 1С")
+    enum_name = "Запрос1С" if dialog_type in ("Запрос1С", "Zapros1S") else "Агент"
+    enum_val = get_enum_value(conn, "ИИА_ТипДиалога", enum_name)
+    if enum_val is None:
+        raise RuntimeError(f"не удалось получить перечисление ИИА_ТипДиалога.{enum_name}")
+    result = call_procedure(conn, "ИИА_ДиалогCOM", "СоздатьДиалогИВыполнитьАгентаСинхронно", user, text, enum_val)
+    return (getattr(result, "Лог", "") or "") if result is not None else ""
+
+
+def main():
+    from com_1c.com_connector import setup_console_encoding
+    setup_console_encoding()
+
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Профиль сборки промптов по стадиям оркестратора (время и размер)"
+    )
+    parser.add_argument("logs", nargs="*", default=[], help="Файлы лога диалога")
+    parser.add_argument("--text", "-t", default=None, help="Запустить новый диалог с этой задачей и профилировать его лог")
+    parser.add_argument("--type", choices=["Agent", "Агент", "Запрос1С", "Zapros1S"], default="Agent", help="Тип диалога для --text")
+    parser.add_argument("--user", "-u", default="Администратор", help="Имя пользователя для --text")
+    parser.add_argument("--connection", "-c", default=None, help="Строка подключения к 1С")
+    parser.add_argument("--series", action="store_true", help="Вывести вызовы по порядку и рост размера промпта")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args()
+
+    if not args.logs and not args.text:
+        parser.error("укажите файлы лога или --text")
+
+    calls = []
+    for path in args.logs:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            calls.extend(parse_log(f.read()))
+    if args.text:
+        try:
+            calls.extend(parse_log(run_dialog_log(args.text, args.type, args.user, args.connection)))
+        except Exception as e:
+            print(f"Ошибка запуска диалога: {e}", file=sys.stderr)
+            return 1
+
+    rows = summarize(calls)
+    if args.json:
+        result = {"stages": rows, "growth": growth(calls)} if args.series else rows
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print_table(rows)
+        if args.series:
+            print()
+            print_series(calls)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
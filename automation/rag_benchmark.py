@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк RAG-поиска: качество (recall@k, MRR, nDCG) и скорость по размеченным запросам.
+
+Запросы и ожидаемые объекты (Тип.Имя) берутся из rag_benchmark_queries.json, набор выбирается
+по идентификатору конфигурации (ИИА_ЯдроМетаданных.ОпределитьИдКонфигурации) или задаётся --set.
+Поиск выполняется через COM (ИИА_RAG_Поиск.ВыполнитьПоискПоТексту) или по снимку индекса
+в памяти (rag_service.py, --index). Выдача поиска — чанки, поэтому повтор объекта ниже по списку
+не считается новым попаданием; ранги — позиции в выдаче, которую видит промпт.
+
+Результат сохраняется JSON-базой (--save) и сравнивается с прошлой (--compare): правка стоп-слов,
+синонимов (ИИА_RAG_Настройки) или ранжирования сопровождается цифрами до/после.
+
+Запуск (из каталога automation):
+    python rag_benchmark.py --save rag_baselines/ut_before.json
+    python rag_benchmark.py --reindex --compare rag_baselines/ut_before.json --save rag_baselines/ut_after.json
+    python rag_benchmark.py --index rag_index.json --repeat 20
+    python rag_benchmark.py --index rag_index.json --ranking bm25 --compare rag_baselines/ut_tfidf.json
+    python rag_benchmark.py --index rag_index.json --compare rag_baselines/ut_before.json --fail-on-regression
+"""
+
+import sys
+import os
+import json
+import math
+import time
+from datetime import datetime
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+if _script_dir not in sys.path:
+    sys.path.insert(0, _script_dir)
+
+DEFAULT_FIXTURES = os.path.join(_script_dir, "rag_benchmark_queries.json")
+DEFAULT_TOP = 10
+RECALL_KS = (1, 3, 5, 10)
+QUALITY_METRICS = ["mrr", "ndcg@10"] + [f"recall@{k}" for k in RECALL_KS]
+
+
+def _get(obj, name, default=None):
+    try:
+        return getattr(obj, name, default)
+    except Exception:
+        return default
+
+
+def load_fixtures(path: str, set_name: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    sets = data.get("sets") or {}
+    if set_name not in sets:
+        raise KeyError(f"в {path} нет набора запросов «{set_name}» (есть: {', '.join(sorted(sets))})")
+    return sets[set_name]
+
+
+def object_id(result: dict) -> str:
+    return f"{result.get('Тип', '')}.{result.get('Имя', '')}"
+
+
+def score_query(found: list, expected: list, top: int) -> dict:
+    """Метрики одного запроса по выдаче found (список Тип.Имя в порядке рангов)."""
+    relevant = set(expected)
+    ranks = {}
+    for position, obj in enumerate(found[:top], 1):
+        if obj in relevant and obj not in ranks:
+            ranks[obj] = position
+    first = min(ranks.values()) if ranks else None
+
+    dcg = sum(1.0 / math.log2(rank + 1) for rank in ranks.values() if rank <= 10)
+    ideal = sum(1.0 / math.log2(i + 1) for i in range(1, min(len(relevant), 10) + 1))
+    metrics = {
+        "mrr": 1.0 / first if first else 0.0,
+        "ndcg@10": dcg / ideal if ideal else 0.0,
+    }
+    for k in RECALL_KS:
+        metrics[f"recall@{k}"] = sum(1 for rank in ranks.values() if rank <= k) / len(relevant) if relevant else 0.0
+    return {"first_rank": first, "ranks": ranks, "metrics": metrics}
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(p):
+        index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+        return round(ordered[index], 3)
+
+    return {
+        "p50": pick(50),
+        "p90": pick(90),
+        "p95": pick(95),
+        "p99": pick(99),
+        "max": round(ordered[-1], 3),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "samples": len(ordered),
+    }
+
+
+class ComEngine:
+    name = "com"
+    ranking = ""
+
+    def __init__(self, connection: str):
+        from com_1c import connect_to_1c
+        from com_1c.config import get_connection_string
+
+        self.conn = connect_to_1c(get_connection_string(connection))
+        if self.conn is None:
+            raise RuntimeError("не удалось подключиться к 1С")
+
+    def config_id(self) -> str:
+        from com_1c import call_procedure
+
+        name = _get(_get(self.conn, "Metadata"), "Name", "") or ""
+        return call_procedure(self.conn, "ИИА_ЯдроМетаданных", "ОпределитьИдКонфигурации", name) or "Unknown"
+
+    def rebuild(self) -> float:
+        from com_1c import call_procedure
+
+        started = time.perf_counter()
+        call_procedure(self.conn, "ИИА_RAG_Индексатор", "ПерестроитьИндекс")
+        return time.perf_counter() - started
+
+    def search(self, query: str, top: int) -> list:
+        from com_1c import call_procedure
+
+        json_str = call_procedure(self.conn, "ИИА_RAG_Поиск", "ВыполнитьПоискПоТексту", query, top, self.ranking)
+        return json.loads(json_str) if isinstance(json_str, str) and json_str else []
+
+
+class SnapshotEngine:
+    name = "snapshot"
+    ranking = ""
+
+    def __init__(self, path: str):
+        from rag_service import RagIndex
+
+        started = time.perf_counter()
+        self.index = RagIndex.load(path)
+        self.load_seconds = time.perf_counter() - started
+
+    def config_id(self) -> str:
+        return self.index.config_id or "Unknown"
+
+    def search(self, query: str, top: int) -> list:
+        return self.index.search(query, top, ranking=self.ranking or None)
+
+
+def run_benchmark(engine, fixtures: list, top: int, repeat: int) -> dict:
+    queries = []
+    all_samples = []
+    for item in fixtures:
+        samples = []
+        results = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            results = engine.search(item["query"], top)
+            samples.append((time.perf_counter() - started) * 1000)
+        all_samples.extend(samples)
+        found = [object_id(r) for r in results]
+        scored = score_query(found, item["expected"], top)
+        queries.append({
+            "query": item["query"],
+            "expected": item["expected"],
+            "first_rank": scored["first_rank"],
+            "ranks": scored["ranks"],
+            "metrics": {name: round(value, 4) for name, value in scored["metrics"].items()},
+            "latency_ms": percentiles(samples),
+            "top": found,
+        })
+
+    summary = {
+        name: round(sum(q["metrics"][name] for q in queries) / len(queries), 4) if queries else 0.0
+        for name in QUALITY_METRICS
+    }
+    return {"metrics": summary, "latency_ms": percentiles(all_samples), "queries": queries}
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Разница метрик с базой: общие метрики, задержка p50/p95 и запросы, у которых сменился ранг."""
+    metrics = {}
+    for name in QUALITY_METRICS:
+        before = baseline.get("metrics", {}).get(name)
+        after = current["metrics"].get(name)
+        if before is None or after is None:
+            continue
+        metrics[name] = {"before": before, "after": after, "delta": round(after - before, 4)}
+    latency = {}
+    for name in ("p50", "p95"):
+        before = baseline.get("latency_ms", {}).get(name)
+        after = current["latency_ms"].get(name)
+        if before is not None and after is not None:
+            latency[name] = {"before": before, "after": after, "delta": round(after - before, 3)}
+    before_ranks = {q["query"]: q.get("first_rank") for q in baseline.get("queries", [])}
+    changed = []
+    for q in current["queries"]:
+        if q["query"] in before_ranks and before_ranks[q["query"]] != q["first_rank"]:
+            changed.append({"query": q["query"], "before": before_ranks[q["query"]], "after": q["first_rank"]})
+    return {"baseline": baseline.get("created", ""), "metrics": metrics, "latency_ms": latency, "changed_queries": changed}
+
+
+def print_report(report: dict) -> None:
+    def rank(value):
+        return "-" if value is None else str(value)
+
+    print(f"Движок: {report['engine']} ({report['ranking']}) | конфигурация: {report['config_id']} | запросов: {len(report['queries'])} | top={report['top']}")
+    if report.get("index_build_s") is not None:
+        print(f"Перестроение индекса: {report['index_build_s']:.1f} с")
+    if report.get("index_load_s") is not None:
+        print(f"Загрузка снимка индекса: {report['index_load_s']:.2f} с")
+    print()
+    width = max([len(q["query"]) for q in report["queries"]] + [6])
+    print(f"{'запрос'.ljust(width)}  ранг  MRR    nDCG   p50 мс")
+    print(f"{'-' * width}  ----  -----  -----  ------")
+    for q in report["queries"]:
+        print(f"{q['query'].ljust(width)}  {rank(q['first_rank']).rjust(4)}  "
+              f"{q['metrics']['mrr']:.3f}  {q['metrics']['ndcg@10']:.3f}  {q['latency_ms'].get('p50', 0):>6}")
+    print()
+    print("  ".join(f"{name}={value:.3f}" for name, value in report["metrics"].items()))
+    latency = report["latency_ms"]
+    if latency:
+        print(f"Задержка, мс: p50={latency['p50']} p90={latency['p90']} p95={latency['p95']} "
+              f"p99={latency['p99']} max={latency['max']} (замеров {latency['samples']})")
+
+    comparison = report.get("comparison")
+    if comparison:
+        print()
+        print(f"Сравнение с базой от {comparison['baseline'] or '?'}:")
+        for name, item in list(comparison["metrics"].items()) + [(f"latency {k}", v) for k, v in comparison["latency_ms"].items()]:
+            print(f"  {name:<12} {item['before']} -> {item['after']} ({item['delta']:+})")
+        for item in comparison["changed_queries"]:
+            print(f"  ранг «{item['query']}»: {rank(item['before'])} -> {rank(item['after'])}")
+
+
+def main():
+    from com_1c.com_connector import setup_console_encoding
+    setup_console_encoding()
+
+    import argparse
+    parser = argparse.ArgumentParser(description="Бенчмарк RAG-поиска: recall@k, MRR, nDCG и задержка")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Файл размеченных запросов")
+    parser.add_argument("--set", default=None, help="Набор запросов (по умолчанию — по конфигурации базы/снимка)")
+    parser.add_argument("--index", "-i", default=None, help="Снимок индекса (rag_service.py --export) вместо COM")
+    parser.add_argument("--connection", "-c", default=None, help="Строка подключения к 1С")
+    parser.add_argument("--reindex", action="store_true", help="Перестроить индекс через COM и замерить время сборки")
+    parser.add_argument("--ranking", choices=("tfidf", "bm25"), default="",
+                        help="Ранжирование (по умолчанию — из ИИА_RAG_Настройки)")
+    parser.add_argument("--top", "-n", type=int, default=DEFAULT_TOP, help=f"Размер выдачи (по умолчанию {DEFAULT_TOP})")
+    parser.add_argument("--repeat", "-r", type=int, default=3, help="Повторов каждого запроса для замера задержки (по умолчанию 3)")
+    parser.add_argument("--save", default=None, metavar="FILE", help="Сохранить результат как JSON-базу")
+    parser.add_argument("--compare", default=None, metavar="FILE", help="Сравнить с сохранённой базой")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Код возврата 1, если какая-либо метрика качества ниже базы больше чем на --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Допустимое снижение метрик качества (по умолчанию 0)")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args()
+
+    if args.index and args.reindex:
+        parser.error("--reindex работает только через COM (без --index)")
+
+    try:
+        engine = SnapshotEngine(args.index) if args.index else ComEngine(args.connection)
+        engine.ranking = args.ranking
+        set_name = args.set or engine.config_id()
+        fixtures = load_fixtures(args.fixtures, set_name)
+        index_build_s = engine.rebuild() if args.reindex else None
+        result = run_benchmark(engine, fixtures, args.top, args.repeat)
+    except Exception as e:
+        print(f"Ошибка бенчмарка: {e}", file=sys.stderr)
+        return 1
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "engine": engine.name,
+        "ranking": args.ranking or "default",
+        "config_id": set_name,
+        "fixtures": os.path.basename(args.fixtures),
+        "top": args.top,
+        "repeat": args.repeat,
+        "index_build_s": round(index_build_s, 2) if index_build_s is not None else None,
+        "index_load_s": round(engine.load_seconds, 3) if args.index else None,
+    }
+    report.update(result)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["comparison"] = compare(result, json.load(f))
+        regressions = [
+            name for name, item in report["comparison"]["metrics"].items()
+            if item["delta"] < -args.tolerance
+        ]
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in report.items() if k != "comparison"}, f, ensure_ascii=False, indent=2)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+        if args.save:
+            print(f"\nБаза сохранена: {args.save}")
+
+    if args.fail_on_regression and regressions:
+        print(f"Снижение метрик относительно базы: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
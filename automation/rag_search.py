@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 """
-RAG-поиск через COM.
+RAG-поиск через COM или через локальный сервис rag_service.py.
 
 Вызывает ИИА_RAG_Поиск.ВыполнитьПоискПоТексту(ЗапросТекст, TopK) и выводит результаты.
 С флагом --fields вызывает ВыполнитьПоискПоТекстуСПолями и выводит поля (реквизиты/измерения/ресурсы) для анализа RAG.
+С --service запросы уходят в сервис по снимку индекса (тот же формат результата, без подключения к 1С).
+--ranking выбирает базовое ранжирование (tfidf или bm25), --compare-ranking выводит выдачи обоих режимов рядом.
 
 Запуск (из каталога automation):
     python rag_search.py остатки склад
@@ -11,11 +13,16 @@ RAG-поиск через COM.
     python rag_search.py --top 5 реализация
     python rag_search.py --fields "продажи реализация категории динамика"
     python rag_search.py -c "File=\"D:\\base\";" номенклатура контрагенты
+    python rag_search.py --service http://127.0.0.1:8765 --fields остатки склад
+    python rag_search.py --ranking bm25 "поступление товаров от поставщика"
+    python rag_search.py --compare-ranking остатки склад "заказ клиента"
 """
 
 import sys
 import os
 import json
+import urllib.request
+import urllib.error
 
 _script_dir = os.path.dirname(os.path.abspath(__file__))
 if _script_dir not in sys.path:
@@ -26,11 +33,15 @@ from com_1c.com_connector import setup_console_encoding
 from com_1c.config import get_connection_string
 
 
-def search_rag(conn, query: str, top_k: int = 10, with_fields: bool = False) -> list:
+RANKINGS = ("tfidf", "bm25")
+
+
+def search_rag(conn, query: str, top_k: int = 10, with_fields: bool = False, ranking: str = "") -> list:
     """Выполняет RAG-поиск и возвращает список результатов.
-    Если with_fields=True, для каждого результата получает поля (attrs для Document/Catalog, reg для регистров)."""
+    Если with_fields=True, для каждого результата получает поля (attrs для Document/Catalog, reg для регистров).
+    ranking — "tfidf" или "bm25"; пустая строка — режим по умолчанию из ИИА_RAG_Настройки."""
     proc = "ВыполнитьПоискПоТекстуСПолями" if with_fields else "ВыполнитьПоискПоТексту"
-    json_str = call_procedure(conn, "ИИА_RAG_Поиск", proc, query, top_k)
+    json_str = call_procedure(conn, "ИИА_RAG_Поиск", proc, query, top_k, ranking or "")
     if json_str is None or not isinstance(json_str, str):
         return []
     try:
@@ -39,6 +50,43 @@ def search_rag(conn, query: str, top_k: int = 10, with_fields: bool = False) ->
         return []
 
 
+def search_rag_service(service_url: str, query: str, top_k: int = 10, with_fields: bool = False,
+                       ranking: str = "") -> list:
+    """Выполняет RAG-поиск через локальный сервис rag_service.py (POST /search)."""
+    body = {"query": query, "top_k": top_k, "fields": with_fields}
+    if ranking:
+        body["ranking"] = ranking
+    payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    req = urllib.request.Request(service_url.rstrip("/") + "/search", data=payload, method="POST")
+    req.add_header("Content-Type", "application/json; charset=utf-8")
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except (urllib.error.URLError, json.JSONDecodeError) as e:
+        print(f"Ошибка запроса к сервису {service_url}: {e}", file=sys.stderr)
+        return []
+
+
+def print_ranking_comparison(results_by_ranking: dict) -> None:
+    """Выводит выдачи двух режимов ранжирования рядом; у объектов второго режима — прежний ранг в первом."""
+    names = list(results_by_ranking)
+    columns = [[f"{r.get('Тип', '')}.{r.get('Имя', '')}" for r in results_by_ranking[name]] for name in names]
+    first_ranks = {obj: index for index, obj in reversed(list(enumerate(columns[0], 1)))}
+    width = max([len(obj) for column in columns for obj in column] + [len(names[0])]) + 2
+    print(f"  {'#':>3}  {names[0].ljust(width)}{names[1]}")
+    for index in range(max(len(column) for column in columns)):
+        left = columns[0][index] if index < len(columns[0]) else ""
+        right = columns[1][index] if index < len(columns[1]) else ""
+        shift = ""
+        if right:
+            before = first_ranks.get(right)
+            if before is None:
+                shift = " (новый)"
+            elif before != index + 1:
+                shift = f" (было {before})"
+        print(f"  {index + 1:>3}  {left.ljust(width)}{right}{shift}")
+
+
 def main():
     setup_console_encoding()
 
@@ -68,13 +116,32 @@ def main():
         action="store_true",
         help="Выводить поля (реквизиты/измерения/ресурсы) для каждого результата — для анализа RAG",
     )
+    parser.add_argument(
+        "--service", "-s",
+        default=None,
+        metavar="URL",
+        help="Искать через сервис rag_service.py (например http://127.0.0.1:8765) вместо COM",
+    )
+    parser.add_argument(
+        "--ranking", "-r",
+        choices=RANKINGS,
+        default="",
+        help="Ранжирование: tfidf или bm25 (по умолчанию — из ИИА_RAG_Настройки)",
+    )
+    parser.add_argument(
+        "--compare-ranking",
+        action="store_true",
+        help="Сравнить выдачи tfidf и bm25 по каждому запросу",
+    )
     args = parser.parse_args()
 
-    connection_string = get_connection_string(args.connection)
-    conn = connect_to_1c(connection_string)
-    if conn is None:
-        print("Ошибка: не удалось подключиться к 1С.", file=sys.stderr)
-        return 1
+    conn = None
+    if not args.service:
+        connection_string = get_connection_string(args.connection)
+        conn = connect_to_1c(connection_string)
+        if conn is None:
+            print("Ошибка: не удалось подключиться к 1С.", file=sys.stderr)
+            return 1
 
     if args.words:
         queries = args.words
@@ -83,7 +150,19 @@ def main():
 
     for query in queries:
         print(f"\n--- Запрос: «{query}» ---")
-        results = search_rag(conn, query, args.top, with_fields=args.fields)
+        if args.compare_ranking:
+            results_by_ranking = {}
+            for ranking in RANKINGS:
+                if args.service:
+                    results_by_ranking[ranking] = search_rag_service(args.service, query, args.top, ranking=ranking)
+                else:
+                    results_by_ranking[ranking] = search_rag(conn, query, args.top, ranking=ranking)
+            print_ranking_comparison(results_by_ranking)
+            continue
+        if args.service:
+            results = search_rag_service(args.service, query, args.top, with_fields=args.fields, ranking=args.ranking)
+        else:
+            results = search_rag(conn, query, args.top, with_fields=args.fields, ranking=args.ranking)
         if not results:
             print("  Результатов нет.")
             continue
@@ -0,0 +1,610 @@
+# -*- coding: utf-8 -*-
+"""
+Локальный сервис RAG-поиска по снимку индекса (HTTP/JSON).
+
+Снимок выгружается из 1С через COM (ИИА_RAG_Поиск.ПолучитьСнимокИндексаJSON) один раз после
+переиндексации и загружается в память. Поиск повторяет ранжирование ИИА_RAG_Поиск.ВыполнитьПоиск
+(нормализация, стемминг, синонимы, таблица расширений, TF-IDF или BM25, бонусы и пессимизации) без запросов к регистрам
+и возвращает тот же JSON: Rank, Score, Тип, Имя, Синоним, Путь (с --fields — Поля, ПоляКандидаты).
+
+API:
+    GET  /search?q=остатки склад&top=10&fields=1&ranking=bm25
+    POST /search  {"query": "...", "top_k": 10, "fields": false, "ranking": "bm25", "context": {"ActiveObjectName": "..."}}
+    GET  /health  — размер индекса, конфигурация, дата сборки
+    POST /reload  — перечитать файл снимка
+
+Запуск (из каталога automation):
+    python rag_service.py --export rag_index.json
+    python rag_service.py --index rag_index.json --port 8765
+    python rag_service.py --index rag_index.json --query "остатки склад" --fields
+    python rag_service.py --index rag_index.json --query "остатки склад" --ranking bm25
+    python rag_search.py --service http://127.0.0.1:8765 остатки склад
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+if _script_dir not in sys.path:
+    sys.path.insert(0, _script_dir)
+
+DEFAULT_PORT = 8765
+SNAPSHOT_VERSION = 1
+
+# ИИА_RAG_Текст
+DELIMITERS = ".,:;()[]{}\\/-_\"'`|!?"
+_DELIMITERS_TABLE = str.maketrans({ch: " " for ch in DELIMITERS})
+ENDINGS_5 = "иями,ями,иями,ющего,ующему,остью".split(",")
+ENDINGS_3 = "ами,ями,ого,ему,ыми,ими,ать,ять,ией,иям,иях,июю,яющ".split(",")
+ENDINGS_2 = "ой,ый,ая,ое,ые,ам,ям,ов,ев,ом,ем,ах,ях,ую,юю,ия,ие,ий,ть,ти,ят,ат,ет,ит,ых,их".split(",")
+
+# ИИА_RAG_Поиск.ВыполнитьПоиск
+QUERY_TYPE_NAMES = [
+    ("Document", "Документ"),
+    ("Catalog", "Справочник"),
+    ("Enum", "Перечисление"),
+    ("InfoReg", "РегистрСведений"),
+    ("AccumReg", "РегистрНакопления"),
+]
+RANKINGS = ("tfidf", "bm25")
+# ИИА_RAG_Настройки.ПолучитьПараметрыBM25 — для снимков, выгруженных до появления BM25
+DEFAULT_BM25 = {
+    "k1": 1.2,
+    "b": 0.75,
+    "field_weights": {"header": 2.0, "reg": 1.5, "enum": 1.0, "field": 0.8, "attrs": 0.6, "tab": 0.4},
+    "default_ranking": "tfidf",
+}
+NOISE_TOKENS = {"документ", "s:документ", "текущий", "s:текущ"}
+TECHNICAL_NAME_PARTS = ("ПрисоединенныеФайлы", "Изменения", "НаборыЗначений", "ИИА_")
+
+
+def split_camel_case(text: str) -> str:
+    """РеализацияТоваров -> Реализация Товаров (ИИА_RAG_Текст.РазрезатьCamelCase)."""
+    if len(text) < 2:
+        return text
+    result = []
+    previous = ""
+    for index, char in enumerate(text):
+        if index > 0 and char.upper() == char and char.lower() != char \
+                and (previous.lower() == previous or previous in "0123456789"):
+            result.append(" ")
+        result.append(char)
+        previous = char
+    return "".join(result)
+
+
+def normalize(text) -> str:
+    """ИИА_RAG_Текст.Нормализовать."""
+    if text is None:
+        return ""
+    text = split_camel_case(text).lower().translate(_DELIMITERS_TABLE).strip()
+    while "  " in text:
+        text = text.replace("  ", " ")
+    return text
+
+
+def _is_cyrillic(code: int) -> bool:
+    return 1040 <= code <= 1103 or code in (1025, 1105)
+
+
+def stem(word: str) -> str:
+    """ИИА_RAG_Текст.Стеммировать (Stem-lite)."""
+    word = word.lower()
+    if len(word) < 5:
+        return word
+    if not all(_is_cyrillic(ord(ch)) for ch in word):
+        return word
+    for endings in (ENDINGS_5, ENDINGS_3, ENDINGS_2):
+        for ending in endings:
+            if word.endswith(ending):
+                return word[:-len(ending)]
+    return word
+
+
+def tokenize(text: str, stop_words=None) -> list:
+    """ИИА_RAG_Текст.Токенизировать: токены и стемы "s:..."."""
+    tokens = []
+    if not text or not text.strip():
+        return tokens
+    for part in text.split(" "):
+        token = part.strip()
+        if not token or len(token) < 2 or len(token) > 64:
+            continue
+        if stop_words and token in stop_words:
+            continue
+        tokens.append(token)
+        stemmed = stem(token)
+        if stemmed and stemmed != token:
+            tokens.append("s:" + stemmed)
+    return tokens
+
+
+def expansion_key(token: str) -> str:
+    """ИИА_RAG_Текст.КлючРасширения: ключ токена в таблице расширений (стем "s:..." или сам токен)."""
+    stemmed = stem(token)
+    if stemmed and stemmed != token:
+        return "s:" + stemmed
+    return token
+
+
+@lru_cache(maxsize=1024)
+def _like_to_regex(pattern: str):
+    """Шаблон ПОДОБНО (% и _) в регулярное выражение."""
+    parts = []
+    for char in pattern:
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts) + r"\Z", re.DOTALL)
+
+
+def chunk_kind(key: str) -> str:
+    """ИИА_RAG_Настройки.ВидЧанка: header, attrs, tab, reg, enum или field."""
+    suffix = key.rsplit("|", 1)[-1]
+    return "field" if suffix.startswith("field_") else suffix
+
+
+class RagIndex:
+    """Снимок индекса RAG в памяти и поиск по нему."""
+
+    def __init__(self, snapshot: dict):
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"неподдерживаемая версия снимка: {snapshot.get('version')}")
+        self.config_name = snapshot.get("config_name", "")
+        self.config_id = snapshot.get("config_id", "")
+        self.built_at = snapshot.get("built_at", "")
+        self.stop_words = set(snapshot.get("stop_words") or [])
+        self.synonyms = snapshot.get("synonyms") or {}
+        # {КлючТокена: [[Токен, Вес], ...]}; в снимках до появления таблицы расширений ее нет
+        self.expansions = snapshot.get("expansions") or {}
+        self.bm25 = dict(DEFAULT_BM25, **(snapshot.get("bm25") or {}))
+        self.idf = snapshot.get("idf") or {}
+        self.postings = {
+            token: [(key, tf) for key, tf in items]
+            for token, items in (snapshot.get("postings") or {}).items()
+        }
+        self.chunks = snapshot.get("chunks") or {}
+        # Нормализованные имя и синоним нужны на каждом поиске — считаем один раз
+        for chunk in self.chunks.values():
+            chunk["_norm_name"] = normalize(chunk.get("Имя", ""))
+            chunk["_norm_synonym"] = normalize(chunk.get("Синоним", ""))
+
+    @classmethod
+    def load(cls, path: str) -> "RagIndex":
+        with open(path, encoding="utf-8-sig") as f:
+            return cls(json.load(f))
+
+    def info(self) -> dict:
+        return {
+            "config_name": self.config_name,
+            "config_id": self.config_id,
+            "built_at": self.built_at,
+            "chunks": len(self.chunks),
+            "tokens": len(self.postings),
+            "expansions": len(self.expansions),
+        }
+
+    def search(self, query: str, top_k: int = 10, with_fields: bool = False, context: dict = None,
+               ranking: str = None) -> list:
+        """Возвращает результаты в формате ВыполнитьПоискПоТексту / ВыполнитьПоискПоТекстуСПолями."""
+        results = self._rank(query, top_k, context, ranking)
+        items = []
+        for row in results:
+            item = {
+                "Rank": row["Rank"],
+                "Score": row["Score"],
+                "Тип": row["Тип"],
+                "Имя": row["Имя"],
+                "Синоним": row["Синоним"],
+                "Путь": row["Путь"],
+            }
+            if with_fields:
+                item["Поля"] = self._fields_text(row)
+                item["ПоляКандидаты"] = self.field_candidates(query, row["Тип"], row["Имя"], 5)
+            items.append(item)
+        return items
+
+    def _base_score(self, bm25: bool, key: str, tf: float) -> float:
+        """Вклад одного вхождения токена без IDF и коэффициентов: TF или BM25 с весом вида чанка."""
+        if not bm25:
+            return tf
+        k1 = self.bm25["k1"]
+        chunk = self.chunks.get(key) or {}
+        norm = chunk.get("НормаДлины") or 1
+        weight = self.bm25["field_weights"].get(chunk_kind(key), 1.0)
+        return weight * tf * (k1 + 1) / (tf + k1 * norm)
+
+    def _rank(self, query: str, top_k: int, context: dict, ranking: str = None) -> list:
+        if not query or not query.strip():
+            return []
+        for english, russian in QUERY_TYPE_NAMES:
+            query = query.replace(english, russian)
+
+        norm_query = normalize(query)
+        query_tokens = tokenize(norm_query, self.stop_words)
+        if not query_tokens:
+            return []
+
+        # Расширение синонимами; повтор токена запроса учитывается столько раз, сколько он встречается
+        all_tokens = []
+        for token in query_tokens:
+            all_tokens.append(token)
+            for synonym in self.synonyms.get(token) or []:
+                if synonym not in all_tokens:
+                    all_tokens.append(synonym)
+
+        # Расширение по таблице из синонимов метаданных; вклад токена умножается на вес связи
+        query_keys = []
+        for token in query_tokens:
+            if not token.startswith("s:"):
+                key = expansion_key(token)
+                if key not in query_keys:
+                    query_keys.append(key)
+        expansion_weights = {}
+        for key in query_keys:
+            for token, weight in self.expansions.get(key) or []:
+                if token not in all_tokens:
+                    all_tokens.append(token)
+                    expansion_weights[token] = weight
+
+        multiplicity = {}
+        for token in all_tokens:
+            if self.idf.get(token, 0) > 0:
+                multiplicity[token] = multiplicity.get(token, 0) + 1
+        if not multiplicity:
+            return []
+
+        bm25 = (ranking or self.bm25["default_ranking"]).lower() == "bm25"
+        query_token_set = set(query_tokens)
+        candidates = {}
+        reasons = {}
+        for token, count in multiplicity.items():
+            factor = self.idf[token]
+            if token.startswith("s:"):
+                factor *= 0.5
+            factor *= expansion_weights.get(token, 1)
+            if token in query_token_set:
+                factor *= 1.5
+            for key, tf in self.postings.get(token, ()):
+                score = factor * self._base_score(bm25, key, tf)
+                for _ in range(count):
+                    candidates[key] = candidates.get(key, 0) + score
+                    reasons.setdefault(key, []).append("токен:" + token)
+        if not candidates:
+            return []
+
+        query_upper = query.upper()
+        norm_query_upper = norm_query.upper()
+        about_stock = any(word in norm_query_upper for word in ("ОСТАТК", "ЗАПАС", "СКЛАД"))
+        about_sales = "ПРОДАЖ" in norm_query_upper or "ДИНАМИК" in norm_query_upper
+        about_vat = "НДС" in norm_query_upper
+        about_prices = "ЦЕН" in norm_query_upper
+        about_grain_mp = "ЗЕРНО" in query_upper
+        about_marketplace = ("МАРКЕТПЛЕЙС" in query_upper or " МП" in query_upper
+                             or "МП " in query_upper or query_upper.startswith("МП"))
+        about_traceability = "ПРОСЛЕЖИВ" in query_upper or "ЕАЭС" in query_upper
+        about_edo = "ЭЛЕКТРОН" in query_upper
+        about_gov_systems = any(word in query_upper for word in ("ЕГАИС", "ВЕТИС", "САТУРН"))
+        significant = [t for t in query_tokens if t not in ("документ", "текущий") and len(t) >= 3]
+        clean_query = norm_query.replace("документ", "").strip()
+        active_object = (context or {}).get("ActiveObjectName")
+
+        for key in candidates:
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                continue
+            chunk_type = chunk.get("Тип", "")
+            name = chunk.get("Имя", "")
+            synonym = chunk.get("Синоним", "")
+            norm_name = chunk["_norm_name"]
+            norm_synonym = chunk["_norm_synonym"]
+            key_reasons = reasons[key]
+            bonus = 0
+            type_factor = 1.0
+
+            if chunk_type == "Document":
+                type_factor = 2.0
+            elif chunk_type in ("Catalog", "Report", "DataProcessor"):
+                type_factor = 1.5
+            elif chunk_type == "Enum":
+                type_factor = 0.05
+
+            if any(part in name for part in TECHNICAL_NAME_PARTS):
+                type_factor *= 0.01
+            if ("Электронн" in name or "Электронн" in synonym) and not about_edo:
+                type_factor *= 0.3
+            if any(word in name for word in ("ЕГАИС", "ВЕТИС", "САТУРН")) and not about_gov_systems:
+                type_factor *= 0.2
+            name_upper = name.upper()
+            if (name_upper.endswith("ЗЕРНО") or name_upper.endswith("МП")) \
+                    and not about_grain_mp and not about_marketplace:
+                type_factor *= 0.2
+            if "ПРОСЛЕЖИВ" in name_upper and not about_traceability:
+                type_factor *= 0.2
+
+            if about_stock and chunk_type == "AccumReg" \
+                    and any(word in norm_name for word in ("запас", "остат", "склад")) \
+                    and "прослежива" not in norm_name:
+                bonus += 3500
+                key_reasons.append("ядро:остатки")
+
+            if about_sales and chunk_type == "AccumReg" and "продаж" in norm_name:
+                bonus += 3500
+                key_reasons.append("ядро:продажи")
+
+            vat_object = chunk_type in ("AccumReg", "InfoReg") and ("НДС" in name_upper or "НДС" in synonym.upper())
+            if about_sales and vat_object and not about_vat:
+                type_factor *= 0.15
+                key_reasons.append("пессимизация:ндс_для_продаж")
+
+            if about_prices and chunk_type == "InfoReg" and "цен" in norm_name:
+                bonus += 3500
+                key_reasons.append("ядро:цены")
+
+            unique_tokens = {
+                reason[6:] for reason in key_reasons
+                if reason.startswith("токен:") and reason[6:] not in NOISE_TOKENS
+            }
+            if len(unique_tokens) > 1:
+                bonus += len(unique_tokens) ** 2 * 150
+
+            matched = 0
+            for token in significant:
+                if token in norm_name or token in norm_synonym:
+                    matched += 1
+                    if norm_name.startswith(token) or norm_synonym.startswith(token):
+                        bonus += 100
+            if significant and matched == len(significant):
+                bonus += 1500
+                key_reasons.append("совпадение:полное")
+
+            if clean_query:
+                if clean_query in norm_name:
+                    bonus += 500
+                    key_reasons.append("совпадение:имя")
+                if clean_query in norm_synonym:
+                    bonus += 600
+                    key_reasons.append("совпадение:синоним")
+
+            found_synonym = False
+            for token in query_tokens:
+                if found_synonym:
+                    break
+                for synonym_token in self.synonyms.get(token) or []:
+                    if len(synonym_token) >= 4 and (synonym_token in norm_name or synonym_token in norm_synonym):
+                        bonus += 400
+                        key_reasons.append("совпадение:синоним_в_объекте")
+                        found_synonym = True
+                        break
+
+            if active_object and active_object == name:
+                bonus += 80
+                key_reasons.append("контекст:активный объект")
+
+            if chunk.get("Ядро"):
+                bonus += 2000
+                key_reasons.append("ядро")
+
+            candidates[key] = (candidates[key] + bonus) * type_factor
+
+        rows = []
+        for key, score in candidates.items():
+            chunk = self.chunks.get(key) or {}
+            rows.append({
+                "Score": score,
+                "Тип": chunk.get("Тип", ""),
+                "Имя": chunk.get("Имя", ""),
+                "Синоним": chunk.get("Синоним", ""),
+                "Путь": chunk.get("Путь", ""),
+                "КлючЧанка": key,
+                "Причины": "; ".join(reasons[key]),
+            })
+        rows.sort(key=lambda row: row["Score"], reverse=True)
+        rows = rows[:max(0, int(top_k))]
+        for index, row in enumerate(rows, 1):
+            row["Rank"] = index
+        return rows
+
+    def _fields_text(self, row: dict) -> str:
+        """Текст чанка с полями: для Document/Catalog — чанк attrs, иначе найденный чанк."""
+        chunk = self.chunks.get(row["КлючЧанка"])
+        if row["Тип"] in ("Document", "Catalog"):
+            attrs = self.chunks.get(f"{row['Тип']}|{row['Имя']}|attrs")
+            if attrs and (attrs.get("Текст") or "").strip():
+                chunk = attrs
+        if chunk and (chunk.get("Текст") or "").strip():
+            return chunk["Текст"]
+        return ""
+
+    def field_candidates(self, query: str, object_type: str, object_name: str, top_k: int = 5) -> str:
+        """ИИА_RAG_Поиск.ПолучитьКандидатыПолейДляОбъекта: поля объекта, совпавшие с токенами запроса."""
+        if not query or not query.strip() or not object_type or not object_name:
+            return ""
+        tokens = tokenize(normalize(query), self.stop_words)
+        if not tokens:
+            return ""
+        pattern = _like_to_regex(f"{object_type}|{object_name}|field_%")
+        scores = {}
+        for token in tokens:
+            for key, tf in self.postings.get(token, ()):
+                if pattern.match(key):
+                    scores[key] = scores.get(key, 0) + tf
+        names = []
+        for key, _ in sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]:
+            parts = [part for part in key.split("|") if part]
+            if len(parts) >= 3 and parts[2].startswith("field_"):
+                names.append(parts[2][6:])
+        return ", ".join(names)
+
+
+def export_snapshot(conn, path: str) -> dict:
+    """Выгружает снимок индекса из 1С в файл и возвращает сводку по нему."""
+    from com_1c import call_procedure
+
+    json_str = call_procedure(conn, "ИИА_RAG_Поиск", "ПолучитьСнимокИндексаJSON")
+    if not isinstance(json_str, str) or not json_str:
+        raise RuntimeError("ПолучитьСнимокИндексаJSON вернула пустой результат")
+    snapshot = json.loads(json_str)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return RagIndex(snapshot).info()
+
+
+class _IndexHolder:
+    """Текущий индекс сервиса; /reload подменяет его целиком, поиски идут по старому до подмены."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.index = RagIndex.load(path)
+
+    def reload(self) -> RagIndex:
+        index = RagIndex.load(self.path)
+        with self.lock:
+            self.index = index
+        return index
+
+
+def make_handler(holder: _IndexHolder):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, payload, status=200):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _search(self, params: dict):
+            query = params.get("query") or params.get("q") or ""
+            try:
+                top_k = int(params.get("top_k") or params.get("top") or 10)
+            except (TypeError, ValueError):
+                return self._send_json({"error": "top_k должен быть числом"}, 400)
+            fields = params.get("fields")
+            with_fields = fields is True or str(fields).lower() in ("1", "true", "yes")
+            context = params.get("context") if isinstance(params.get("context"), dict) else None
+            ranking = params.get("ranking") or None
+            if ranking is not None and str(ranking).lower() not in RANKINGS:
+                return self._send_json({"error": f"ranking: ожидается одно из {', '.join(RANKINGS)}"}, 400)
+            started = time.perf_counter()
+            results = holder.index.search(query, top_k, with_fields, context, ranking)
+            self.log_message("search %r top=%d ranking=%s: %d results, %.3f ms",
+                             query, top_k, ranking or "default", len(results), (time.perf_counter() - started) * 1000)
+            self._send_json(results)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/search":
+                params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                return self._search(params)
+            if url.path == "/health":
+                return self._send_json(holder.index.info())
+            self._send_json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if url.path == "/reload":
+                try:
+                    return self._send_json(holder.reload().info())
+                except Exception as e:
+                    return self._send_json({"error": f"не удалось загрузить снимок: {e}"}, 500)
+            if url.path == "/search":
+                try:
+                    params = json.loads(raw.decode("utf-8") or "{}")
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    return self._send_json({"error": "тело запроса должно быть JSON"}, 400)
+                if not isinstance(params, dict):
+                    return self._send_json({"error": "тело запроса должно быть JSON-объектом"}, 400)
+                return self._search(params)
+            self._send_json({"error": "not found"}, 404)
+
+    return Handler
+
+
+def main():
+    from com_1c.com_connector import setup_console_encoding
+    setup_console_encoding()
+
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Локальный сервис RAG-поиска по снимку индекса (HTTP/JSON)"
+    )
+    parser.add_argument("--export", metavar="FILE", default=None,
+                        help="Выгрузить снимок индекса из 1С через COM в файл и выйти")
+    parser.add_argument("--connection", "-c", default=None, help="Строка подключения к 1С (для --export)")
+    parser.add_argument("--index", "-i", default="rag_index.json", help="Файл снимка индекса (по умолчанию rag_index.json)")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес сервиса (по умолчанию 127.0.0.1)")
+    parser.add_argument("--port", "-p", type=int, default=DEFAULT_PORT, help=f"Порт сервиса (по умолчанию {DEFAULT_PORT})")
+    parser.add_argument("--query", "-q", action="append", default=[],
+                        help="Выполнить поиск по снимку без запуска сервиса (можно повторять)")
+    parser.add_argument("--top", "-n", type=int, default=10, help="Количество результатов для --query")
+    parser.add_argument("--fields", "-f", action="store_true", help="Поля объектов в результатах --query")
+    parser.add_argument("--ranking", choices=RANKINGS, default=None,
+                        help="Ранжирование для --query (по умолчанию — из снимка, ИИА_RAG_Настройки)")
+    args = parser.parse_args()
+
+    if args.export:
+        from com_1c import connect_to_1c
+        from com_1c.config import get_connection_string
+
+        conn = connect_to_1c(get_connection_string(args.connection))
+        if conn is None:
+            print("Ошибка: не удалось подключиться к 1С.", file=sys.stderr)
+            return 1
+        started = time.time()
+        try:
+            info = export_snapshot(conn, args.export)
+        except Exception as e:
+            print(f"Ошибка выгрузки снимка: {e}", file=sys.stderr)
+            return 1
+        print(f"Снимок выгружен в {args.export} за {time.time() - started:.1f} с: "
+              f"чанков {info['chunks']}, токенов {info['tokens']}, конфигурация {info['config_name']}")
+        return 0
+
+    started = time.time()
+    try:
+        holder = _IndexHolder(args.index)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка загрузки снимка {args.index}: {e}", file=sys.stderr)
+        return 1
+    info = holder.index.info()
+    print(f"Снимок {args.index} загружен за {time.time() - started:.1f} с: "
+          f"чанков {info['chunks']}, токенов {info['tokens']}, сборка {info['built_at'] or '-'}")
+
+    if args.query:
+        for query in args.query:
+            started = time.perf_counter()
+            results = holder.index.search(query, args.top, args.fields, ranking=args.ranking)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"\n--- Запрос: «{query}» ({elapsed_ms:.3f} мс) ---")
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(holder))
+    print(f"Сервис RAG-поиска: http://{args.host}:{args.port}/search?q=...", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
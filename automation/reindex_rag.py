@@ -2,11 +2,17 @@
 """
 Запуск переиндексации RAG и уведомление в Telegram по окончании.
 
-Вызывает ИИА_RAG_Индексатор.ПерестроитьИндекс() через COM, измеряет время,
-отправляет уведомление в Telegram (успех или ошибка).
+По умолчанию индекс строится партиями в параллельных фоновых заданиях 1С:
+ИИА_RAG_Индексатор.ЗапуститьПерестроениеИндекса делит коллекции метаданных на партии,
+ПолучитьСостояниеПерестроения опрашивается до завершения всех партий (прогресс и время по каждой),
+ЗавершитьПерестроениеИндекса один раз считает DF/IDF, нормы длины чанков и таблицу расширений.
+С --sequential вызывается ИИА_RAG_Индексатор.ПерестроитьИндекс() в текущем сеансе.
+По окончании отправляется уведомление в Telegram (успех или ошибка).
 
 Запуск (из каталога automation):
     python reindex_rag.py
+    python reindex_rag.py --partitions 16
+    python reindex_rag.py --sequential
     python reindex_rag.py --connection "File=\"D:\\base\";"
 
 Секреты Telegram в .env: TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
@@ -14,6 +20,7 @@
 
 import sys
 import os
+import time
 import urllib.request
 import urllib.error
 import urllib.parse
@@ -23,7 +30,7 @@ _script_dir = os.path.dirname(os.path.abspath(__file__))
 if _script_dir not in sys.path:
     sys.path.insert(0, _script_dir)
 
-from com_1c import connect_to_1c, call_procedure
+from com_1c import connect_to_1c, call_procedure, safe_getattr, com_array
 from com_1c.com_connector import setup_console_encoding
 from com_1c.config import get_connection_string
 
@@ -73,6 +80,87 @@ def send_telegram_with_status(message: str, disabled: bool = False) -> None:
         print("Telegram не настроен (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID в .env)")
 
 
+DEFAULT_PARTITIONS = 8
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_TIMEOUT = 7200
+
+
+def _partition_state(state) -> dict:
+    return {
+        "name": safe_getattr(state, "Имя", ""),
+        "state": safe_getattr(state, "Состояние", ""),
+        "objects": int(safe_getattr(state, "Объектов") or 0),
+        "done": int(safe_getattr(state, "Обработано") or 0),
+        "chunks": int(safe_getattr(state, "Чанков") or 0),
+        "seconds": float(safe_getattr(state, "Секунд") or 0),
+        "error": safe_getattr(state, "Ошибка", "") or "",
+    }
+
+
+def rebuild_parallel(conn, partitions: int, poll_interval: float, timeout: float) -> dict:
+    """Строит индекс партиями в фоновых заданиях и печатает прогресс по каждой партии.
+
+    Возвращает {"partitions": [...], "chunks", "tokens", "expansions", "merge_seconds"}; при ошибке партии — исключение."""
+    started = call_procedure(conn, "ИИА_RAG_Индексатор", "ЗапуститьПерестроениеИндекса", partitions)
+    build_id = safe_getattr(started, "ИдСборки")
+    planned = com_array(safe_getattr(started, "Партии"))
+    print(f"Запущено партий: {len(planned)}")
+    for partition in planned:
+        print(f"  {safe_getattr(partition, 'Имя')}: объектов {int(safe_getattr(partition, 'Объектов') or 0)}")
+
+    began = time.time()
+    last_lines = {}
+    states = []
+    while True:
+        time.sleep(poll_interval)
+        states = [
+            _partition_state(state)
+            for state in com_array(call_procedure(conn, "ИИА_RAG_Индексатор", "ПолучитьСостояниеПерестроения", build_id))
+        ]
+        for state in states:
+            line = (f"  [{state['state']}] {state['name']}: {state['done']}/{state['objects']} объектов, "
+                    f"чанков {state['chunks']}, {state['seconds']:.0f} с")
+            if state["error"]:
+                line += f" | {state['error']}"
+            if last_lines.get(state["name"]) != line:
+                print(line, flush=True)
+                last_lines[state["name"]] = line
+        active = [state for state in states if state["state"] == "Активно"]
+        if len(states) >= len(planned) and not active:
+            break
+        if time.time() - began > timeout:
+            raise RuntimeError(f"превышен таймаут {timeout:.0f} с, активных партий: {len(active)}")
+
+    failed = [state for state in states if state["state"] != "Завершено"]
+    if failed:
+        raise RuntimeError("; ".join(f"{state['name']}: {state['error'] or state['state']}" for state in failed))
+
+    print("Все партии завершены, расчет DF/IDF, норм длины и таблицы расширений...")
+    merge_started = time.time()
+    merged = call_procedure(conn, "ИИА_RAG_Индексатор", "ЗавершитьПерестроениеИндекса", build_id, len(planned))
+    return {
+        "partitions": states,
+        "chunks": int(safe_getattr(merged, "Чанков") or 0),
+        "tokens": int(safe_getattr(merged, "Токенов") or 0),
+        "expansions": int(safe_getattr(merged, "Расширений") or 0),
+        "merge_seconds": time.time() - merge_started,
+    }
+
+
+def print_partition_summary(result: dict) -> None:
+    partitions = sorted(result["partitions"], key=lambda state: state["seconds"], reverse=True)
+    width = max([len(state["name"]) for state in partitions] + [6])
+    print()
+    print(f"{'партия'.ljust(width)}  объектов  чанков   секунд")
+    for state in partitions:
+        print(f"{state['name'].ljust(width)}  {state['objects']:>8}  {state['chunks']:>6}  {state['seconds']:>7.0f}")
+    total_seconds = sum(state["seconds"] for state in partitions)
+    slowest = partitions[0]["seconds"] if partitions else 0
+    print(f"Сумма времени партий: {total_seconds:.0f} с, самая долгая: {slowest:.0f} с, "
+          f"расчет статистики: {result['merge_seconds']:.1f} с")
+    print(f"Чанков: {result['chunks']}, токенов: {result['tokens']}, токенов с расширениями: {result['expansions']}")
+
+
 def main():
     setup_console_encoding()
 
@@ -85,6 +173,31 @@ def main():
         default=None,
         help="Строка подключения к 1С",
     )
+    parser.add_argument(
+        "--partitions", "-p",
+        type=int,
+        default=DEFAULT_PARTITIONS,
+        help=f"Число партий (фоновых заданий) для параллельной сборки (по умолчанию {DEFAULT_PARTITIONS})",
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="Строить индекс в текущем сеансе без фоновых заданий (ПерестроитьИндекс)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        metavar="SEC",
+        help=f"Интервал опроса партий в секундах (по умолчанию {DEFAULT_POLL_INTERVAL})",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        metavar="SEC",
+        help=f"Таймаут сборки в секундах (по умолчанию {DEFAULT_TIMEOUT})",
+    )
     parser.add_argument(
         "--no-telegram",
         action="store_true",
@@ -106,8 +219,12 @@ def main():
         return 1
 
     print("Запуск переиндексации RAG...")
+    result = None
     try:
-        call_procedure(conn, "ИИА_RAG_Индексатор", "ПерестроитьИндекс")
+        if args.sequential:
+            call_procedure(conn, "ИИА_RAG_Индексатор", "ПерестроитьИндекс")
+        else:
+            result = rebuild_parallel(conn, max(1, args.partitions), args.poll_interval, args.timeout)
     except Exception as exc:
         elapsed = (datetime.now() - started_at).total_seconds()
         err_text = str(exc)
@@ -121,11 +238,18 @@ def main():
         return 1
 
     elapsed = (datetime.now() - started_at).total_seconds()
+    if result:
+        print_partition_summary(result)
     print(f"Переиндексация завершена за {elapsed:.1f} с")
 
+    details = ""
+    if result:
+        details = (f"Партий: {len(result['partitions'])}, чанков: {result['chunks']}, "
+                   f"токенов: {result['tokens']}\n")
     msg = (
         "<b>RAG: переиндексация завершена</b>\n\n"
         f"Время: {elapsed:.1f} с\n"
+        f"{details}"
         f"Дата: {started_at.strftime('%Y-%m-%d %H:%M')}"
     )
     send_telegram_with_status(msg, args.no_telegram)
@@ -6,10 +6,16 @@
     python run_dialog.py --text "Покажи всех контрагентов" --type Запрос1С
     python run_dialog.py --text "Создай документ" --type Agent --log-file run_log.txt
     python run_dialog.py -t "Задача" -u "Администратор" --connection "File=\"D:\\base\";"
+    python run_dialog.py --text "Создай документ" --follow --log-file run_log.txt
+
+С --follow агент запускается в фоновом задании 1С (ИИА_ДиалогCOM.СоздатьДиалогИЗапуститьАгента),
+а новые записи лога печатаются по мере появления (ИИА_ДиалогCOM.ПолучитьЗаписиЛога, курсор по
+позиции последней прочитанной записи), без повторной передачи всего лога в конце.
 """
 
 import sys
 import os
+import time
 from datetime import datetime
 
 # Поддержка запуска из каталога automation
@@ -17,13 +23,151 @@ _script_dir = os.path.dirname(os.path.abspath(__file__))
 if _script_dir not in sys.path:
     sys.path.insert(0, _script_dir)
 
-from com_1c import connect_to_1c, call_procedure, get_enum_value
+from com_1c import connect_to_1c, call_procedure, get_enum_value, safe_getattr, com_array
 from com_1c.com_connector import setup_console_encoding
 from com_1c.config import get_connection_string
 
 # Максимальный размер лог-файла в байтах (по умолчанию 10 МБ)
 DEFAULT_MAX_LOG_SIZE = 10 * 1024 * 1024
 
+# Интервал опроса лога в режиме --follow (секунды) и размер порции записей за один вызов
+DEFAULT_POLL_INTERVAL = 1.0
+FOLLOW_BATCH_SIZE = 500
+
+
+def follow_dialog_log(conn, dialog_ref, poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """Генератор записей лога диалога (Роль, CallId, Лог) по мере их появления.
+
+    Каждый вызов ИИА_ДиалогCOM.ПолучитьЗаписиЛога передаёт только записи после сохранённой позиции.
+    Завершается, когда оркестратор остановлен и все его записи прочитаны."""
+    position = ""
+    while True:
+        tail = call_procedure(conn, "ИИА_ДиалогCOM", "ПолучитьЗаписиЛога", dialog_ref, position, FOLLOW_BATCH_SIZE)
+        for entry in com_array(safe_getattr(tail, "Записи")):
+            yield entry
+        position = safe_getattr(tail, "Позиция") or position
+        if safe_getattr(tail, "Завершен", False):
+            return
+        if not safe_getattr(tail, "ЕстьЕще", False):
+            time.sleep(poll_interval)
+
+
+class DialogMessages:
+    """Сообщения диалога по курсору версии (ИИА_ДиалогCOM.ПолучитьНовыеСообщения).
+
+    Каждый проход итератора запрашивает только сообщения, появившиеся после предыдущего прохода:
+
+        messages = DialogMessages(conn, dialog_ref)
+        for msg in messages: ...   # все сообщения диалога
+        for msg in messages: ...   # только новые с прошлого прохода
+    """
+
+    def __init__(self, conn, dialog_ref, version: str = "", last_uid: str = ""):
+        self.conn = conn
+        self.dialog_ref = dialog_ref
+        self.version = version
+        self.last_uid = last_uid
+        # Истина, если курсор не совпал с историей и последний проход вернул все сообщения
+        self.full_reload = False
+
+    def __iter__(self):
+        delta = call_procedure(
+            self.conn, "ИИА_ДиалогCOM", "ПолучитьНовыеСообщения", self.dialog_ref, self.version, self.last_uid
+        )
+        self.full_reload = bool(safe_getattr(delta, "ПолныйСписок", False))
+        self.version = safe_getattr(delta, "Версия") or self.version
+        self.last_uid = safe_getattr(delta, "ПоследнийУИД") or self.last_uid
+        yield from com_array(safe_getattr(delta, "Сообщения"))
+
+
+def open_log_file(path: str, max_size: int, verbose: bool):
+    """Открывает лог-файл на дозапись; при превышении max_size переносит старый файл в .old."""
+    log_path = os.path.abspath(path)
+    # Ротация: если файл превышает лимит, сохраняем в .old и начинаем заново
+    if os.path.exists(log_path) and os.path.getsize(log_path) >= max_size:
+        old_path = log_path + ".old"
+        if os.path.exists(old_path):
+            os.remove(old_path)
+        os.rename(log_path, old_path)
+        if verbose:
+            print(f"Ротация лога: {log_path} -> {old_path}")
+    return open(log_path, "a", encoding="utf-8")
+
+
+def session_header(ref_str: str, success, text: str) -> str:
+    """Заголовок сессии в лог-файле: дата, диалог, задача, результат."""
+    return (
+        f"\n{'='*60}\n"
+        f"run_dialog | {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        f"Диалог: {ref_str} | Успех: {success}\n"
+        f"Задача: {text[:80]}{'...' if len(text) > 80 else ''}\n"
+        f"{'='*60}\n"
+    )
+
+
+def run_follow(conn, args, enum_val) -> int:
+    """Запускает агента в фоновом задании и печатает лог по мере выполнения."""
+    try:
+        started = call_procedure(
+            conn,
+            "ИИА_ДиалогCOM",
+            "СоздатьДиалогИЗапуститьАгента",
+            args.user,
+            args.text,
+            enum_val,
+        )
+    except Exception as e:
+        print(f"Ошибка вызова ИИА_ДиалогCOM: {e}", file=sys.stderr)
+        return 1
+
+    ref_obj = safe_getattr(started, "СсылкаДиалога")
+    ref_str = str(ref_obj) if ref_obj is not None else ""
+    if not safe_getattr(started, "Успех", False):
+        print(f"Ошибка запуска агента: {safe_getattr(started, 'Ошибка') or '(нет описания)'}", file=sys.stderr)
+        return 1
+
+    print(f"Диалог: {ref_str}")
+    print("--- Лог ---")
+
+    log_file = None
+    try:
+        if args.log_file:
+            log_file = open_log_file(args.log_file, args.log_max_size, args.verbose)
+            log_file.write(session_header(ref_str, "выполняется (--follow)", args.text))
+        entries = 0
+        for entry in follow_dialog_log(conn, ref_obj, args.poll_interval):
+            text = safe_getattr(entry, "Лог") or ""
+            print(text, flush=True)
+            if log_file:
+                log_file.write(text + "\n")
+                log_file.flush()
+            entries += 1
+    except KeyboardInterrupt:
+        print("\nПрервано: агент продолжает работу в фоновом задании 1С", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Ошибка чтения лога: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if log_file:
+            log_file.close()
+
+    print()
+    print(f"--- Агент завершил работу, записей лога: {entries} ---")
+    try:
+        visible = [m for m in DialogMessages(conn, ref_obj) if not safe_getattr(m, "СкрытоеСлужебное", False)]
+    except Exception as e:
+        print(f"Ошибка чтения сообщений: {e}", file=sys.stderr)
+        visible = []
+    if visible:
+        print("--- Сообщения ---")
+        for message in visible:
+            print(safe_getattr(message, "Текст") or "")
+            print()
+    if args.log_file:
+        print(f"Лог дописан в {args.log_file}")
+    return 0
+
 
 def main():
     setup_console_encoding()
@@ -65,6 +209,18 @@ def main():
         metavar="BYTES",
         help=f"Макс. размер лог-файла в байтах, при превышении выполняется ротация (по умолчанию {DEFAULT_MAX_LOG_SIZE})",
     )
+    parser.add_argument(
+        "--follow", "-f",
+        action="store_true",
+        help="Запустить агента в фоновом задании и выводить лог по мере выполнения",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        metavar="SEC",
+        help=f"Интервал опроса лога для --follow в секундах (по умолчанию {DEFAULT_POLL_INTERVAL})",
+    )
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -91,6 +247,9 @@ def main():
         print(f"Ошибка: не удалось получить перечисление ИИА_ТипДиалога.{enum_value_name}", file=sys.stderr)
         return 1
 
+    if args.follow:
+        return run_follow(conn, args, enum_val)
+
     try:
         result = call_procedure(
             conn,
@@ -109,15 +268,9 @@ def main():
         return 1
 
     # Получаем поля из COM-структуры (result — объект 1С с полями Успех, Лог, СсылкаДиалога)
-    def _get(obj, name, default=None):
-        try:
-            return getattr(obj, name, default)
-        except Exception:
-            return default
-
-    success = _get(result, "Успех", False)
-    log_text = _get(result, "Лог") or ""
-    ref_obj = _get(result, "СсылкаДиалога")
+    success = safe_getattr(result, "Успех", False)
+    log_text = safe_getattr(result, "Лог") or ""
+    ref_obj = safe_getattr(result, "СсылкаДиалога")
     ref_str = str(ref_obj) if ref_obj is not None else ""
 
     print("--- Результат ---")
@@ -129,25 +282,8 @@ def main():
 
     if args.log_file:
         try:
-            log_path = os.path.abspath(args.log_file)
-            # Ротация: если файл превышает лимит, сохраняем в .old и начинаем заново
-            if os.path.exists(log_path) and os.path.getsize(log_path) >= args.log_max_size:
-                old_path = log_path + ".old"
-                if os.path.exists(old_path):
-                    os.remove(old_path)
-                os.rename(log_path, old_path)
-                if args.verbose:
-                    print(f"Ротация лога: {log_path} -> {old_path}")
-            # Заголовок сессии: дата, диалог, задача, результат
-            session_header = (
-                f"\n{'='*60}\n"
-                f"run_dialog | {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                f"Диалог: {ref_str} | Успех: {success}\n"
-                f"Задача: {args.text[:80]}{'...' if len(args.text) > 80 else ''}\n"
-                f"{'='*60}\n"
-            )
-            with open(log_path, "a", encoding="utf-8") as f:
-                f.write(session_header)
+            with open_log_file(args.log_file, args.log_max_size, args.verbose) as f:
+                f.write(session_header(ref_str, success, args.text))
                 f.write(log_text or "(лог пуст)")
                 f.write("\n")
             print(f"\nЛог дописан в {args.log_file}")
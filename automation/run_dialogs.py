@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Пакетный запуск диалогов агента ИИ через COM в фоновых заданиях 1С.
+
+Каждый диалог запускается через ИИА_ДиалогCOM.СоздатьДиалогИЗапуститьАгента (фоновое задание),
+состояние всех выполняющихся диалогов опрашивается одним вызовом ИИА_ДиалогCOM.ПолучитьСостояниеДиалогов
+(флаг оркестратора, активность задания, токены), результат забирается через ПолучитьРезультатДиалога
+по мере завершения. Одно COM-соединение ведёт десятки запусков одновременно.
+
+Файл задач: .txt — одна задача на строку; .json — список строк или объектов {"text", "type"}.
+
+Запуск (из каталога automation):
+    python run_dialogs.py --text "Покажи всех контрагентов" --text "Покажи все склады" --type Запрос1С
+    python run_dialogs.py --tasks tasks.txt --max-parallel 10 --log-dir ./logs
+    python run_dialogs.py --tasks tasks.json --json
+"""
+
+import sys
+import os
+import time
+import json
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+if _script_dir not in sys.path:
+    sys.path.insert(0, _script_dir)
+
+from com_1c import connect_to_1c, call_procedure, get_enum_value, safe_getattr, com_array
+from com_1c.com_connector import setup_console_encoding
+from com_1c.config import get_connection_string
+
+DEFAULT_MAX_PARALLEL = 10
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_TIMEOUT = 1800
+
+TYPE_MAP = {"Agent": "Агент", "Агент": "Агент", "Запрос1С": "Запрос1С", "Zapros1S": "Запрос1С"}
+
+
+def load_tasks(path: str, default_type: str) -> list:
+    """Читает задачи из .txt (строка — задача) или .json (строки или объекты text/type)."""
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            items = json.load(f)
+        else:
+            items = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    tasks = []
+    for item in items:
+        if isinstance(item, str):
+            tasks.append({"text": item, "type": default_type})
+        else:
+            tasks.append({"text": item["text"], "type": item.get("type", default_type)})
+    return tasks
+
+
+def poll_states(conn, refs: list) -> list:
+    """Состояния диалогов одним COM-вызовом; порядок совпадает с refs."""
+    array = conn.NewObject("Массив")
+    for ref in refs:
+        array.Add(ref)
+    states = com_array(call_procedure(conn, "ИИА_ДиалогCOM", "ПолучитьСостояниеДиалогов", array))
+    return [
+        {
+            "finished": bool(safe_getattr(state, "Завершен", False)),
+            "usage_tokens": int(safe_getattr(state, "UsageTokens") or 0),
+        }
+        for state in states
+    ]
+
+
+def run_batch(conn, tasks: list, user: str, max_parallel: int, poll_interval: float,
+              timeout: float, with_log: bool, on_done=None) -> list:
+    """Запускает задачи не более чем по max_parallel одновременно и собирает результаты по мере завершения.
+
+    Возвращает список результатов в порядке задач: index, text, type, dialog, success,
+    usage_tokens, seconds, error, log (если with_log)."""
+    enum_values = {}
+    pending = list(enumerate(tasks))
+    running = []
+    results = [None] * len(tasks)
+
+    def finish(job, success, error="", usage_tokens=0, log_text=""):
+        result = {
+            "index": job["index"],
+            "text": job["task"]["text"],
+            "type": job["task"]["type"],
+            "dialog": job["dialog"],
+            "success": success,
+            "usage_tokens": usage_tokens,
+            "seconds": round(time.time() - job["started"], 1),
+            "error": error,
+        }
+        if with_log:
+            result["log"] = log_text
+        results[job["index"]] = result
+        if on_done:
+            on_done(result)
+
+    while pending or running:
+        while pending and len(running) < max_parallel:
+            index, task = pending.pop(0)
+            enum_name = TYPE_MAP.get(task["type"], "Агент")
+            if enum_name not in enum_values:
+                enum_values[enum_name] = get_enum_value(conn, "ИИА_ТипДиалога", enum_name)
+            job = {"index": index, "task": task, "ref": None, "dialog": "", "started": time.time()}
+            try:
+                started = call_procedure(conn, "ИИА_ДиалогCOM", "СоздатьДиалогИЗапуститьАгента",
+                                         user, task["text"], enum_values[enum_name])
+            except Exception as e:
+                finish(job, False, f"ошибка запуска: {e}")
+                continue
+            job["ref"] = safe_getattr(started, "СсылкаДиалога")
+            job["dialog"] = str(job["ref"]) if job["ref"] is not None else ""
+            if not safe_getattr(started, "Успех", False):
+                finish(job, False, f"ошибка запуска: {safe_getattr(started, 'Ошибка') or '(нет описания)'}")
+                continue
+            running.append(job)
+
+        if not running:
+            continue
+        time.sleep(poll_interval)
+
+        states = poll_states(conn, [job["ref"] for job in running])
+        still_running = []
+        for job, state in zip(running, states):
+            if state["finished"]:
+                result = call_procedure(conn, "ИИА_ДиалогCOM", "ПолучитьРезультатДиалога", job["ref"], with_log)
+                finish(
+                    job,
+                    bool(safe_getattr(result, "Успех", False)),
+                    usage_tokens=int(safe_getattr(result, "UsageTokens") or state["usage_tokens"]),
+                    log_text=safe_getattr(result, "Лог") or "",
+                )
+            elif time.time() - job["started"] > timeout:
+                call_procedure(conn, "ИИА_ДиалогCOM", "ОстановитьДиалог", job["ref"])
+                finish(job, False, f"превышен таймаут {timeout:.0f} с, оркестратор остановлен",
+                       usage_tokens=state["usage_tokens"])
+            else:
+                still_running.append(job)
+        running = still_running
+
+    return results
+
+
+def main():
+    setup_console_encoding()
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Пакетный запуск диалогов агента ИИ через COM (фоновые задания 1С)"
+    )
+    parser.add_argument("--text", "-t", action="append", default=[], help="Текст задачи (можно повторять)")
+    parser.add_argument("--tasks", default=None, help="Файл задач (.txt или .json)")
+    parser.add_argument("--user", "-u", default="Администратор", help="Имя пользователя (по умолчанию: Администратор)")
+    parser.add_argument(
+        "--type",
+        choices=["Agent", "Агент", "Запрос1С", "Zapros1S"],
+        default="Agent",
+        help="Тип диалога по умолчанию (по умолчанию: Agent)",
+    )
+    parser.add_argument("--connection", "-c", default=None, help="Строка подключения к 1С")
+    parser.add_argument(
+        "--max-parallel",
+        type=int,
+        default=DEFAULT_MAX_PARALLEL,
+        help=f"Сколько диалогов выполнять одновременно (по умолчанию {DEFAULT_MAX_PARALLEL})",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        metavar="SEC",
+        help=f"Интервал опроса состояния в секундах (по умолчанию {DEFAULT_POLL_INTERVAL})",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        metavar="SEC",
+        help=f"Таймаут одного диалога в секундах, после него оркестратор останавливается (по умолчанию {DEFAULT_TIMEOUT})",
+    )
+    parser.add_argument("--log-dir", default=None, help="Каталог для логов диалогов (файл на задачу)")
+    parser.add_argument("--json", action="store_true", help="Вывести итог в JSON")
+    args = parser.parse_args()
+
+    tasks = [{"text": text, "type": args.type} for text in args.text]
+    if args.tasks:
+        tasks.extend(load_tasks(args.tasks, args.type))
+    if not tasks:
+        parser.error("укажите --text или --tasks")
+
+    conn = connect_to_1c(get_connection_string(args.connection))
+    if not conn:
+        return 1
+
+    if args.log_dir:
+        os.makedirs(args.log_dir, exist_ok=True)
+
+    def on_done(result):
+        status = "OK" if result["success"] else "FAIL"
+        if not args.json:
+            print(
+                f"[{status}] #{result['index'] + 1} {result['seconds']} с, токенов {result['usage_tokens']} | "
+                f"{result['text'][:60]}{' | ' + result['error'] if result['error'] else ''}",
+                flush=True,
+            )
+        if args.log_dir:
+            log_path = os.path.join(args.log_dir, f"dialog_{result['index'] + 1:03d}.txt")
+            with open(log_path, "w", encoding="utf-8") as f:
+                f.write(f"{result['text']}\n")
+                f.write(f"Тип: {result['type']} | Успех: {result['success']} | Диалог: {result['dialog']}\n")
+                f.write(f"{'='*60}\n")
+                f.write(result.get("log") or "(лог пуст)")
+
+    started = time.time()
+    try:
+        results = run_batch(
+            conn,
+            tasks,
+            args.user,
+            max(1, args.max_parallel),
+            args.poll_interval,
+            args.timeout,
+            with_log=bool(args.log_dir),
+            on_done=on_done,
+        )
+    except Exception as e:
+        print(f"Ошибка пакетного запуска: {e}", file=sys.stderr)
+        return 1
+
+    passed = sum(1 for r in results if r["success"])
+    total_tokens = sum(r["usage_tokens"] for r in results)
+    if args.json:
+        for r in results:
+            r.pop("log", None)
+        print(json.dumps({"results": results, "passed": passed, "total": len(results),
+                          "usage_tokens": total_tokens}, ensure_ascii=False, indent=2))
+    else:
+        print()
+        print(f"Итого: {passed}/{len(results)} успешно, токенов {total_tokens}, {time.time() - started:.1f} с")
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,49 +12,144 @@
     python run_tests.py --ai-only          # только боевые тесты с ИИ
     python run_tests.py --test ТестRunQuery # один тест
     python run_tests.py --skip-update      # пропустить обновление БД
+    python run_tests.py --jobs 4           # набор в 4 процессах, по COM-подключению на процесс
+    python run_tests.py --junit results.xml --durations 20
+    python run_tests.py --changed          # только тесты, затронутые незакоммиченными изменениями BSL-модулей
+    python run_tests.py --changed --base main
     python run_tests.py --connection "File=\"D:\\base\";"
 """
 
 import sys
 import os
 import subprocess
+import time
+import multiprocessing
+import xml.etree.ElementTree as ET
 
 # Поддержка запуска из каталога automation
 _script_dir = os.path.dirname(os.path.abspath(__file__))
 if _script_dir not in sys.path:
     sys.path.insert(0, _script_dir)
 
-from com_1c import connect_to_1c, call_procedure
+from com_1c import connect_to_1c, call_procedure, com_array, safe_getattr
 from com_1c.com_connector import setup_console_encoding
 from com_1c.config import get_connection_string
 
 
-def _get(obj, name, default=None):
-    """Безопасно получает атрибут COM-объекта."""
+# Наборы тестов: ключ ИИА_Тесты.ПолучитьСписокТестов и заголовок вывода
+SUITE_TITLES = {
+    "Бесплатные": "Бесплатные тесты",
+    "ХолостойХод": "Тесты холостого хода (mock)",
+    "СИИ": "Боевые тесты с ИИ",
+    "Все": "Тесты (включая с вызовом ИИ)",
+}
+
+
+def _com_list(value):
+    """Массив 1С -> список строк."""
+    return [str(item) for item in com_array(value)]
+
+
+def run_test(conn, name, worker=0):
+    """
+    Выполняет один тест ИИА_Тесты.<name> и возвращает результат обычным словарем
+    (его можно передать между процессами): name, success, message, details, seconds, worker.
+    """
+    started = time.perf_counter()
     try:
-        return getattr(obj, name, default)
-    except Exception:
-        return default
+        result = call_procedure(conn, "ИИА_Тесты", name)
+    except Exception as e:
+        result = None
+        message = f"Ошибка вызова ИИА_Тесты.{name}: {e}"
+    else:
+        message = "Процедура вернула пустой результат"
+    seconds = time.perf_counter() - started
+    if result is None:
+        return {"name": name, "success": False, "message": message, "details": [],
+                "seconds": seconds, "worker": worker}
+    return {
+        "name": name,
+        "success": bool(safe_getattr(result, "Успех", False)),
+        "message": str(safe_getattr(result, "Сообщение") or ""),
+        "details": _com_list(safe_getattr(result, "Детали")),
+        "seconds": seconds,
+        "worker": worker,
+    }
+
+
+# Подключение к 1С процесса-исполнителя (--jobs): создается один раз в _init_worker
+_worker_conn = None
+
+
+def _init_worker(connection_string):
+    global _worker_conn
+    setup_console_encoding()
+    _worker_conn = connect_to_1c(connection_string)
+
+
+def _run_in_worker(name):
+    worker = os.getpid()
+    if _worker_conn is None:
+        return {"name": name, "success": False, "message": "Исполнитель не подключился к 1С",
+                "details": [], "seconds": 0.0, "worker": worker}
+    return run_test(_worker_conn, name, worker)
 
 
-def _print_result(name, result, verbose=True):
+def run_tests_parallel(connection_string, names, jobs):
+    """
+    Распределяет тесты по jobs процессам, у каждого свое COM-подключение.
+    Тесты раздаются по одному (imap_unordered, chunksize=1): освободившийся процесс берет следующий,
+    поэтому долгие тесты не задерживают очередь остальных. Результаты — в порядке списка names.
+    """
+    results = {}
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(connection_string,)) as pool:
+        for result in pool.imap_unordered(_run_in_worker, names, chunksize=1):
+            results[result["name"]] = result
+    return [results[name] for name in names]
+
+
+def _print_result(result, verbose=True):
     """Выводит результат одного теста."""
-    success = _get(result, "Успех", False)
-    message = _get(result, "Сообщение") or ""
-    details = _get(result, "Детали")
-    status = "OK" if success else "FAIL"
-    print(f"[{status}] {name}: {message}")
-    if verbose and details is not None:
-        try:
-            if hasattr(details, "Count") and hasattr(details, "Get"):
-                for i in range(details.Count()):
-                    print(f"      {details.Get(i)}")
-            else:
-                for item in details:
-                    print(f"      {item}")
-        except Exception:
-            pass
-    return success
+    status = "OK" if result["success"] else "FAIL"
+    print(f"[{status}] {result['name']}: {result['message']} ({result['seconds']:.2f} с)")
+    if verbose:
+        for item in result["details"]:
+            print(f"      {item}")
+    return result["success"]
+
+
+def print_durations(results, top):
+    """Выводит top самых долгих тестов."""
+    if top <= 0 or not results:
+        return
+    print()
+    print(f"--- Самые долгие тесты ({min(top, len(results))}) ---")
+    for result in sorted(results, key=lambda r: r["seconds"], reverse=True)[:top]:
+        print(f"  {result['seconds']:8.2f} с  {result['name']}")
+
+
+def write_junit(path, suite_name, results, wall_seconds):
+    """Сохраняет результаты в формате JUnit XML (для CI)."""
+    failures = sum(1 for r in results if not r["success"])
+    suite = ET.Element("testsuite", {
+        "name": suite_name,
+        "tests": str(len(results)),
+        "failures": str(failures),
+        "errors": "0",
+        "time": f"{wall_seconds:.3f}",
+    })
+    for result in results:
+        case = ET.SubElement(suite, "testcase", {
+            "classname": "ИИА_Тесты",
+            "name": result["name"],
+            "time": f"{result['seconds']:.3f}",
+        })
+        if not result["success"]:
+            failure = ET.SubElement(case, "failure", {"message": result["message"]})
+            failure.text = "\n".join(result["details"]) or result["message"]
+        elif result["details"]:
+            ET.SubElement(case, "system-out").text = "\n".join(result["details"])
+    ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
 
 
 def main():
@@ -99,6 +194,35 @@ def main():
         action="store_true",
         help="Пропустить обновление БД перед тестами",
     )
+    parser.add_argument(
+        "--changed",
+        action="store_true",
+        help="Только тесты, затронутые изменениями BSL-модулей (см. test_impact.py)",
+    )
+    parser.add_argument(
+        "--base",
+        default="HEAD",
+        help="С чем сравнивать для --changed: коммит или ветка (по умолчанию HEAD — незакоммиченные изменения)",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        help="Число параллельных процессов (по COM-подключению на процесс), по умолчанию 1",
+    )
+    parser.add_argument(
+        "--junit",
+        default=None,
+        metavar="FILE",
+        help="Сохранить результаты в JUnit XML",
+    )
+    parser.add_argument(
+        "--durations",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Показать N самых долгих тестов (0 — не показывать), по умолчанию 10",
+    )
     args = parser.parse_args()
 
     connection_string = get_connection_string(args.connection)
@@ -132,73 +256,84 @@ def main():
 
     if args.test:
         # Один тест
+        result = run_test(conn, args.test)
+        _print_result(result, verbose=True)
+        if args.junit:
+            write_junit(args.junit, args.test, [result], result["seconds"])
+        return 0 if result["success"] else 1
+
+    # Набор тестов: по умолчанию бесплатные, --dry-run холостой ход, --with-ai все, --ai-only только ИИ
+    if args.dry_run:
+        suite = "ХолостойХод"
+    elif args.ai_only:
+        suite = "СИИ"
+    elif args.with_ai:
+        suite = "Все"
+    else:
+        suite = "Бесплатные"
+    try:
+        names = _com_list(call_procedure(conn, "ИИА_Тесты", "ПолучитьСписокТестов", suite))
+        serial = set(_com_list(call_procedure(conn, "ИИА_Тесты", "ТестыБезПараллельности")))
+    except Exception as e:
+        print(f"Ошибка получения списка тестов ИИА_Тесты: {e}", file=sys.stderr)
+        return 1
+    if not names:
+        print(f"Ошибка: набор {suite} пуст", file=sys.stderr)
+        return 1
+
+    if args.changed:
+        from test_impact import ImpactMap, changed_modules
         try:
-            result = call_procedure(
-                conn,
-                "ИИА_Тесты",
-                args.test,
-            )
-        except Exception as e:
-            print(f"Ошибка вызова ИИА_Тесты.{args.test}: {e}", file=sys.stderr)
+            changes = changed_modules(base=args.base)
+        except RuntimeError as e:
+            print(f"Ошибка определения изменений: {e}", file=sys.stderr)
             return 1
+        selected, full_reason = ImpactMap().select(names, changes)
+        print(f"Изменены модули: {', '.join(sorted(changes['modules'])) or '-'}")
+        if full_reason:
+            print(f"Полный набор: {full_reason}")
+        print(f"Затронуто тестов: {len(selected)} из {len(names)}")
+        if not selected:
+            print("Нет тестов для запуска")
+            return 0
+        names = selected
 
-        if result is None:
-            print("Ошибка: процедура вернула пустой результат", file=sys.stderr)
-            return 1
+    jobs = max(1, min(args.jobs, len(names)))
+    print(f"--- {SUITE_TITLES[suite]} ---")
+    if jobs > 1:
+        print(f"Тестов: {len(names)}, процессов: {jobs}")
 
-        success = _print_result(args.test, result, verbose=True)
-        return 0 if success else 1
+    started = time.perf_counter()
+    if jobs > 1:
+        # Тесты, меняющие общие настройки, выполняются после остальных в основном подключении
+        parallel = [name for name in names if name not in serial]
+        by_name = {r["name"]: r for r in run_tests_parallel(connection_string, parallel, jobs)}
+        for name in names:
+            if name not in by_name:
+                by_name[name] = run_test(conn, name)
+        results = [by_name[name] for name in names]
     else:
-        # Набор тестов: по умолчанию бесплатные, --dry-run холостой ход, --with-ai все, --ai-only только ИИ
-        if args.dry_run:
-            proc_name = "ЗапуститьТестыХолостойХод"
-        elif args.ai_only:
-            proc_name = "ЗапуститьТестыСИИ"
-        elif args.with_ai:
-            proc_name = "ЗапуститьВсеТесты"
-        else:
-            proc_name = "ЗапуститьБесплатныеТесты"
-        try:
-            results = call_procedure(
-                conn,
-                "ИИА_Тесты",
-                proc_name,
-            )
-        except Exception as e:
-            print(f"Ошибка вызова ИИА_Тесты.{proc_name}: {e}", file=sys.stderr)
-            return 1
+        results = [run_test(conn, name) for name in names]
+    wall_seconds = time.perf_counter() - started
 
-        if args.dry_run:
-            print("--- Тесты холостого хода (mock) ---")
-        elif args.ai_only:
-            print("--- Боевые тесты с ИИ ---")
-        elif args.with_ai:
-            print("--- Тесты (включая с вызовом ИИ) ---")
-        else:
-            print("--- Бесплатные тесты ---")
-
-        if results is None:
-            print("Ошибка: процедура вернула пустой результат", file=sys.stderr)
-            return 1
+    for result in results:
+        _print_result(result, verbose=args.verbose)
+    print_durations(results, args.durations)
 
-        all_ok = True
+    if args.junit:
         try:
-            count = results.Count()
-            for i in range(count):
-                r = results.Get(i)
-                name = _get(r, "ИмяТеста", f"Тест{i+1}")
-                ok = _print_result(name, r, verbose=args.verbose)
-                if not ok:
-                    all_ok = False
-        except Exception as e:
-            print(f"Ошибка чтения результатов: {e}", file=sys.stderr)
+            write_junit(args.junit, suite, results, wall_seconds)
+        except OSError as e:
+            print(f"Ошибка записи {args.junit}: {e}", file=sys.stderr)
             return 1
 
-        print()
-        print("--- Итого ---")
-        print(f"Результат: {'Все тесты пройдены' if all_ok else 'Есть провалы'}")
-        return 0 if all_ok else 1
-
+    failed = [r["name"] for r in results if not r["success"]]
+    print()
+    print("--- Итого ---")
+    print(f"Тестов: {len(results)}, провалено: {len(failed)}; "
+          f"время {wall_seconds:.1f} с (сумма по тестам {sum(r['seconds'] for r in results):.1f} с)")
+    print(f"Результат: {'Все тесты пройдены' if not failed else 'Есть провалы'}")
+    return 0 if not failed else 1
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Выбор тестов ИИА_Тесты, затронутых изменениями BSL-модулей.
+
+Зависимости берутся из графа вызовов bsl_callgraph.py (индекс по выгрузке xml/): для каждого
+теста известны все процедуры, до которых он доходит напрямую или через другие процедуры.
+По git diff определяются измененные процедуры (по номерам строк) и выбираются тесты, которые
+до них доходят. Изменение свойств общего модуля (<Имя>.xml) затрагивает все его процедуры.
+
+Изменения остальных объектов выгрузки (справочники, регистры, описания форм, Configuration.xml)
+статически не сопоставляются с тестами — тогда выбирается весь набор.
+
+Запуск (из каталога automation):
+    python test_impact.py                  # тесты, затронутые незакоммиченными изменениями
+    python test_impact.py --base main      # изменения относительно ветки main
+    python test_impact.py --map            # карта "тест -> общие модули"
+    python run_tests.py --changed          # запуск только затронутых тестов
+"""
+
+import sys
+import os
+import re
+import subprocess
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+if _script_dir not in sys.path:
+    sys.path.insert(0, _script_dir)
+_root = os.path.dirname(_script_dir)
+
+from bsl_callgraph import CallGraph, XML_DIR, COMMON_MODULES_DIR, module_id
+
+TESTS_MODULE = "ИИА_Тесты"
+DISPATCHER = f"{TESTS_MODULE}.ВыполнитьТест"
+
+_HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+# Все строки модуля (изменены свойства модуля или файл новый)
+ALL_LINES = None
+
+
+class ImpactMap:
+    """Зависимости тестов ИИА_Тесты от процедур BSL по графу вызовов."""
+
+    def __init__(self, graph=None):
+        self.graph = graph or CallGraph.load()
+        self._reach = {}
+
+    def tests(self):
+        """Тесты, вызываемые диспетчером ИИА_Тесты.ВыполнитьТест, в порядке регистрации."""
+        return [
+            self.graph.nodes[node]["name"] for node in self.graph.callees(DISPATCHER)
+            if self.graph.nodes[node]["module"] == TESTS_MODULE
+            and self.graph.nodes[node]["name"].startswith("Тест")
+        ]
+
+    def reachable(self, test):
+        """Процедуры "Модуль.Процедура", до которых доходит тест (включая сам тест)."""
+        if test not in self._reach:
+            node = f"{TESTS_MODULE}.{test}"
+            self._reach[test] = self.graph.reachable([node]) if node in self.graph.nodes else set()
+        return self._reach[test]
+
+    def test_modules(self, test):
+        """Общие модули, процедуры которых выполняет тест."""
+        return {self.graph.nodes[node]["module"] for node in self.reachable(test)} - {TESTS_MODULE}
+
+    def changed_routines(self, modules):
+        """
+        Измененные процедуры "Модуль.Процедура" по {модуль: номера строк или ALL_LINES}.
+        Строки вне процедур (комментарии, области) не затрагивают ни одну процедуру.
+        """
+        changed = set()
+        for module, lines in modules.items():
+            changed |= self.graph.routines_at(module, lines)
+        return changed
+
+    def select(self, tests, changes):
+        """
+        Тесты из tests, затронутые изменениями changes (результат changed_modules).
+        Возвращает (выбранные тесты в исходном порядке, причина полного прогона или None).
+        """
+        if changes["other"]:
+            return list(tests), f"изменены объекты вне BSL-модулей: {', '.join(changes['other'][:5])}"
+        changed = self.changed_routines(changes["modules"])
+        selected = []
+        for test in tests:
+            reach = self.reachable(test)
+            # Тест, не найденный разбором, безопаснее выполнить
+            if not reach or reach & changed:
+                selected.append(test)
+        return selected, None
+
+
+def _git(root, *args):
+    result = subprocess.run(
+        ["git", *args], cwd=root, capture_output=True, text=True, encoding="utf-8",
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)}: {result.stderr.strip()}")
+    return result.stdout
+
+
+def _classify(path):
+    """
+    Путь измененного файла -> ("bsl", модуль), ("module", общий модуль) для <Имя>.xml общего модуля
+    или ("other", None).
+    """
+    if not path.startswith(XML_DIR + "/"):
+        return "other", None
+    rel_path = path[len(XML_DIR) + 1:]
+    if rel_path.endswith(".bsl"):
+        return "bsl", module_id(rel_path)
+    parts = rel_path.split("/")
+    if len(parts) == 2 and parts[0] == COMMON_MODULES_DIR and parts[1].endswith(".xml"):
+        # Свойства модуля (серверный, клиентский, повторное использование)
+        return "module", parts[1][:-len(".xml")]
+    return "other", None
+
+
+def changed_modules(root=_root, base="HEAD"):
+    """
+    Изменения выгрузки относительно base (коммит, ветка), включая незакоммиченные и новые файлы.
+    Возвращает {"modules": {модуль: номера измененных строк BSL или ALL_LINES},
+    "other": [прочие измененные файлы xml]}.
+    """
+    modules, other = {}, []
+
+    def touch(module, lines):
+        if lines is ALL_LINES or modules.get(module, set()) is ALL_LINES:
+            modules[module] = ALL_LINES
+        else:
+            modules.setdefault(module, set()).update(lines)
+
+    diff = _git(root, "-c", "core.quotepath=off", "diff", "-U0", "--no-renames", base, "--", XML_DIR)
+    untracked = _git(root, "-c", "core.quotepath=off", "ls-files", "--others", "--exclude-standard", "--", XML_DIR)
+    current = None
+    for line in diff.splitlines():
+        if line.startswith("diff --git "):
+            kind, module = _classify(line.split(" b/", 1)[-1])
+            current = module if kind == "bsl" else None
+            if kind == "bsl":
+                touch(module, set())
+            elif kind == "module":
+                touch(module, ALL_LINES)
+            else:
+                other.append(line.split(" b/", 1)[-1])
+        elif current is not None:
+            match = _HUNK.match(line)
+            if match:
+                first = int(match.group(1))
+                count = int(match.group(2)) if match.group(2) is not None else 1
+                # Удаление строк (count = 0) относится к соседней строке
+                touch(current, set(range(first, first + max(count, 1))))
+    for path in filter(None, untracked.splitlines()):
+        kind, module = _classify(path)
+        if kind == "other":
+            other.append(path)
+        else:
+            touch(module, ALL_LINES)
+    return {"modules": modules, "other": sorted(set(other))}
+
+
+def main():
+    from com_1c.com_connector import setup_console_encoding
+    setup_console_encoding()
+
+    import argparse
+    parser = argparse.ArgumentParser(description="Тесты ИИА_Тесты, затронутые изменениями BSL-модулей")
+    parser.add_argument("--base", default="HEAD",
+                        help="С чем сравнивать: коммит или ветка (по умолчанию HEAD — незакоммиченные изменения)")
+    parser.add_argument("--map", action="store_true", help="Вывести карту \"тест -> общие модули\"")
+    args = parser.parse_args()
+
+    impact = ImpactMap()
+    tests = impact.tests()
+    if args.map:
+        for test in tests:
+            print(f"{test}: {', '.join(sorted(impact.test_modules(test))) or '-'}")
+        return 0
+
+    try:
+        changes = changed_modules(base=args.base)
+    except RuntimeError as e:
+        print(f"Ошибка git: {e}", file=sys.stderr)
+        return 1
+    selected, full_reason = impact.select(tests, changes)
+    print(f"Изменены модули: {', '.join(sorted(changes['modules'])) or '-'}")
+    if full_reason:
+        print(f"Полный набор: {full_reason}")
+    print(f"Затронуто тестов: {len(selected)} из {len(tests)}")
+    for test in selected:
+        print(f"  {test}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())